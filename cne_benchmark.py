@@ -0,0 +1,388 @@
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import reportlab
+
+from cne_pitching_reports import (
+    TEAM_LOGO_DIR, PercentileIndex, ScoutingReportGenerator, compute_team_totals,
+    filter_main_rows, load_conference_data,
+)
+
+
+# Situational split rows written under every pitcher, in conference-file order
+SPLIT_LABELS = [
+    'Succ-Opp against Leadoff Batter', 'Hits-AB with runners ob', 'Hits-AB vs lhb',
+    'Hits-AB w2outs', 'Bases Empty', 'H-AB scorepos', 'H-AB scorepos2',
+    'H-AB runners2', 'Hits-AB vs rhb', 'H-AB bases loaded',
+]
+
+# Column order of conference_all_pitchers.csv (after the unnamed row-number column)
+CONFERENCE_COLUMNS = [
+    'number', 'player', 'yr', 'pos', 'ht', 'b_t', 'app', 'gs', 'era', 'ip', 'cg', 'h',
+    'r', 'er', 'bb', 'so', 'sho', 'bf', 'p_oab', 'x2b_a', 'x3b_a', 'bk', 'hr_a', 'wp',
+    'hb', 'ibb', 'inh_run', 'inh_run_score', 'sha', 'sfa', 'pitches', 'go', 'fo', 'w',
+    'l', 'sv', 'kl', 'pickoffs', 'AB', 'BAA', 'team_id', 'year', 'flyout_perc',
+    'groundout_perc', 'k_perc', 'bb_perc', 'obp', 'x1b_a', 'ops',
+]
+
+# name: (teams, pitchers per team)
+SCALES = {
+    'conference': (10, 20),
+    'region': (40, 20),
+    'national': (400, 25),
+}
+
+STAGES = ['load', 'load_cached', 'percentiles', 'team_rankings', 'flowables', 'doc_build']
+
+
+def _outs_to_ip(outs):
+    return outs // 3 + (outs % 3) / 10
+
+
+def _derive_rates(frame):
+    """Fill the derived columns cne_team_stats.R adds to the conference file."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frame['AB'] = frame['bf'] - (frame['bb'] + frame['hb'] + frame['ibb'] + frame['sha'] + frame['sfa'])
+        frame['BAA'] = frame['h'] / frame['AB']
+        batted = frame['go'] + frame['fo']
+        frame['flyout_perc'] = frame['fo'] / batted
+        frame['groundout_perc'] = frame['go'] / batted
+        frame['k_perc'] = frame['so'] / frame['bf']
+        frame['bb_perc'] = frame['bb'] / frame['bf']
+        frame['obp'] = (frame['h'] + frame['bb'] + frame['hb']) / (frame['AB'] + frame['bb'] + frame['hb'] + frame['sfa'])
+        frame['x1b_a'] = frame['h'] - (frame['x2b_a'] + frame['x3b_a'] + frame['hr_a'])
+        slg = (frame['x1b_a'] + 2 * frame['x2b_a'] + 3 * frame['x3b_a'] + 4 * frame['hr_a']) / frame['AB']
+        frame['ops'] = frame['obp'] + slg
+        innings = frame['outs'] / 3
+        frame['era'] = np.where(innings > 0, frame['er'] * 9 / innings, 0)
+    return frame
+
+
+_LINE_COLUMNS = ['h', 'r', 'er', 'bb', 'so', 'bf', 'p_oab', 'x2b_a', 'x3b_a', 'hr_a', 'wp',
+                 'hb', 'ibb', 'sha', 'sfa', 'go', 'fo', 'kl', 'outs', 'bk', 'inh_run',
+                 'inh_run_score', 'sho']
+
+
+def _pitching_lines(rng, n, bf):
+    """Counting stats for ``n`` stat lines with ``bf`` batters faced each."""
+    bf = np.asarray(bf)
+    so = rng.binomial(bf, 0.2)
+    bb = rng.binomial(bf - so, 0.1)
+    hb = rng.binomial(bf - so - bb, 0.03)
+    h = rng.binomial(bf - so - bb - hb, 0.33)
+    x2b = rng.binomial(h, 0.2)
+    x3b = rng.binomial(h - x2b, 0.03)
+    hr = rng.binomial(h - x2b - x3b, 0.07)
+    sfa = rng.binomial(bf - so - bb - hb - h, 0.02)
+    sha = rng.binomial(bf - so - bb - hb - h - sfa, 0.01)
+    balls_in_play_outs = bf - so - bb - hb - h - sfa - sha
+    go = rng.binomial(balls_in_play_outs, 0.45)
+    fo = balls_in_play_outs - go
+    outs = so + balls_in_play_outs + sfa + sha
+    er = rng.binomial(h + bb + hb, 0.35)
+    return {
+        'h': h, 'r': er + rng.binomial(np.maximum(er, 0), 0.1), 'er': er, 'bb': bb, 'so': so,
+        'bf': bf, 'p_oab': bf - bb - hb, 'x2b_a': x2b, 'x3b_a': x3b, 'hr_a': hr,
+        'wp': rng.poisson(bf / 60), 'hb': hb, 'ibb': rng.binomial(bb, 0.05), 'sha': sha,
+        'sfa': sfa, 'go': go, 'fo': fo, 'kl': rng.binomial(so, 0.25), 'outs': outs,
+        'bk': np.zeros(n, dtype=int), 'inh_run': np.zeros(n, dtype=int),
+        'inh_run_score': np.zeros(n, dtype=int), 'sho': np.zeros(n, dtype=int),
+    }
+
+
+def make_synthetic_conference(teams, pitchers_per_team, seed=2025, year=2025):
+    """Synthetic pitching frame in the exact conference_all_pitchers.csv shape.
+
+    Every pitcher gets a season line plus the ten situational split rows,
+    and every team a Totals line (with its splits) and an Opponent Totals
+    line, both numbered '-'.
+    """
+    rng = np.random.default_rng(seed)
+    n = teams * pitchers_per_team
+    team_ids = 600000 + np.repeat(np.arange(teams), pitchers_per_team)
+
+    bf = rng.integers(4, 320, n)
+    main = pd.DataFrame(_pitching_lines(rng, n, bf))
+    main['number'] = rng.integers(1, 60, n).astype(str)
+    main['player'] = [f"Pitcher {i:05d}" for i in range(n)]
+    main['yr'] = rng.choice(['Fr', 'So', 'Jr', 'Sr'], n)
+    main['pos'] = rng.choice(['P', 'P', 'P', 'INF', 'OF'], n)
+    main['ht'] = rng.choice(['5-11', '6-0', '6-1', '6-2', '6-3', '6-4'], n)
+    main['b_t'] = rng.choice(['R/R', 'R/R', 'L/L', 'R/L', 'L/R'], n)
+    main['app'] = np.maximum(1, bf // 18)
+    main['gs'] = rng.binomial(main['app'], 0.3)
+    main['cg'] = 0
+    main['pitches'] = bf * 4
+    main['w'] = rng.binomial(main['app'], 0.2)
+    main['l'] = rng.binomial(main['app'], 0.2)
+    main['sv'] = rng.binomial(main['app'] - main['gs'], 0.1)
+    main['pickoffs'] = rng.poisson(0.5, n)
+    main['team_id'] = team_ids
+
+    # Splits: each a share of the pitcher's batters faced
+    split_bf = rng.binomial(np.repeat(bf, len(SPLIT_LABELS)), 0.3)
+    splits = pd.DataFrame(_pitching_lines(rng, len(split_bf), split_bf))
+    splits['number'] = np.tile(SPLIT_LABELS, n)
+    for column in ['player', 'yr', 'pos', 'ht', 'b_t', 'team_id']:
+        splits[column] = np.repeat(main[column].to_numpy(), len(SPLIT_LABELS))
+    for column in ['app', 'gs', 'cg', 'w', 'l', 'sv', 'pickoffs']:
+        splits[column] = 0
+    splits['pitches'] = np.nan
+
+    # Team totals rows, numbered '-' like the scraped files, summed from the
+    # team's pitcher lines, with the team's splits listed under the Totals line
+    season_columns = ['app', 'gs', 'cg', 'w', 'l', 'sv', 'pickoffs', 'pitches']
+    totals = main.groupby('team_id', sort=False)[_LINE_COLUMNS + season_columns].sum().reset_index()
+    totals['number'] = '-'
+    totals['player'] = 'Totals'
+    totals_splits = splits.groupby(['team_id', 'number'], sort=False)[_LINE_COLUMNS].sum().reset_index()
+    totals_splits['player'] = 'Totals'
+    for column in season_columns:
+        totals_splits[column] = 0
+    totals_splits['pitches'] = np.nan
+    opponent = totals.copy()
+    opponent['player'] = 'Opponent Totals'
+    for frame in (totals, totals_splits, opponent):
+        for column in ['yr', 'pos', 'ht', 'b_t']:
+            frame[column] = '-'
+
+    main['order'] = np.arange(n) * (len(SPLIT_LABELS) + 1)
+    splits['order'] = np.repeat(main['order'].to_numpy(), len(SPLIT_LABELS)) + np.tile(
+        np.arange(1, len(SPLIT_LABELS) + 1), n)
+    team_end = (np.arange(teams) + 1) * pitchers_per_team * (len(SPLIT_LABELS) + 1)
+    totals['order'] = team_end - 0.9
+    totals_splits['order'] = np.repeat(team_end, len(SPLIT_LABELS)) - 0.9 + np.tile(
+        np.arange(1, len(SPLIT_LABELS) + 1), teams) * 0.05
+    opponent['order'] = team_end - 0.1
+
+    frame = pd.concat([main, splits, totals, totals_splits, opponent], ignore_index=True)
+    frame = frame.sort_values('order', kind='stable').reset_index(drop=True)
+    frame['ip'] = _outs_to_ip(frame['outs'])
+    frame['year'] = year
+    frame['pitches'] = frame['pitches'].astype('Int64')
+    frame = _derive_rates(frame)
+    return frame[CONFERENCE_COLUMNS]
+
+
+def write_conference_csv(frame, path):
+    """Write a frame the way R's write.csv does: quoted text, NA for missing."""
+    frame = frame.copy()
+    frame.index = np.arange(1, len(frame) + 1).astype(str)
+    text = frame.to_csv(quoting=csv.QUOTE_NONNUMERIC, na_rep='NA', index_label='')
+    with open(path, 'w', newline='') as f:
+        f.write(text.replace(',"NA"', ',NA'))
+
+
+def _time(fn, repeat):
+    runs = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return result, runs
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Interpreter start-up plus the imports a stats-only query and a PDF run need
+COLD_START_IMPORTS = {
+    'python': 'pass',
+    'stats': 'import cne_pitching_reports',
+    'pdf': 'import cne_pitching_reports, cne_pdf_layout',
+}
+
+
+def measure_cold_start(repeat=3):
+    """Wall time of a fresh interpreter running each of COLD_START_IMPORTS."""
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    timings = {}
+    for name, code in COLD_START_IMPORTS.items():
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-c', code], cwd=cwd, check=True)
+            runs.append(time.perf_counter() - start)
+        timings[name] = {'median': statistics.median(runs), 'min': min(runs), 'runs': runs}
+    return timings
+
+
+def run_benchmark(teams, pitchers_per_team, report_teams=1, repeat=3, seed=2025, workdir=None):
+    """Time each report stage on synthetic data; returns a JSON-serializable dict.
+
+    The synthetic CSV and its parsed cache go to ``workdir`` and are kept
+    there; without one they go to a temporary directory that is removed
+    afterwards.
+    """
+    if workdir is None:
+        with tempfile.TemporaryDirectory(prefix='cne_bench_') as tmp:
+            return _run_benchmark(teams, pitchers_per_team, report_teams, repeat, seed, tmp)
+    return _run_benchmark(teams, pitchers_per_team, report_teams, repeat, seed, workdir)
+
+
+def _run_benchmark(teams, pitchers_per_team, report_teams, repeat, seed, workdir):
+    conference_csv = os.path.join(workdir, 'conference_all_pitchers.csv')
+    cache_dir = os.path.join(workdir, 'cache')
+
+    start = time.perf_counter()
+    synthetic = make_synthetic_conference(teams, pitchers_per_team, seed)
+    write_conference_csv(synthetic, conference_csv)
+    generate_seconds = time.perf_counter() - start
+
+    stages = {}
+
+    raw, stages['load'] = _time(lambda: load_conference_data(conference_csv), repeat)
+    load_conference_data(conference_csv, cache_dir)
+    _, stages['load_cached'] = _time(lambda: load_conference_data(conference_csv, cache_dir), repeat)
+
+    conference_df = filter_main_rows(raw)
+
+    def percentiles():
+        index = PercentileIndex(conference_df)
+        index.batch(conference_df)
+        return index
+
+    percentile_index, stages['percentiles'] = _time(percentiles, repeat)
+
+    team_frames = [frame for _, frame in raw.groupby('team_id', sort=True)][:report_teams]
+    generators = [ScoutingReportGenerator(frame, conference_df=conference_df,
+                                          percentile_index=percentile_index,
+                                          team_name=f"bench{i}")
+                  for i, frame in enumerate(team_frames)]
+    # Synthetic teams borrow the shipped logos so the page header is drawn as in real reports
+    logos = sorted(glob.glob(os.path.join(TEAM_LOGO_DIR, '*_logo.png')))
+    for i, generator in enumerate(generators):
+        generator.logo_path = logos[i % len(logos)] if logos else None
+
+    def team_rankings():
+        totals = compute_team_totals(conference_df)
+        for generator in generators:
+            for ranking in generator.team_data()['rankings'].values():
+                generator._create_team_comparison_chart(ranking)
+        return totals
+
+    _, stages['team_rankings'] = _time(team_rankings, repeat)
+
+    def flowables():
+        # The same story a single-file report builds in generate_report
+        stories = []
+        for generator in generators:
+            story = generator._summary_story()
+            for player in generator._pitcher_order():
+                generator._add_player_page(player, story)
+            stories.append(story)
+        return stories
+
+    _, stages['flowables'] = _time(flowables, repeat)
+
+    build_runs = []
+    pages = 0
+    for _ in range(repeat):
+        stories = flowables()
+        start = time.perf_counter()
+        for generator, story in zip(generators, stories):
+            buffer = io.BytesIO()
+            doc = generator._new_doc(buffer)
+            generator._build(doc, story)
+            pages = doc.page
+        build_runs.append(time.perf_counter() - start)
+    stages['doc_build'] = build_runs
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': _git_revision(),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'reportlab': reportlab.Version,
+            'cpu_count': os.cpu_count(),
+        },
+        'params': {
+            'teams': teams,
+            'pitchers_per_team': pitchers_per_team,
+            'report_teams': len(generators),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'data': {
+            'rows': len(raw),
+            'pitchers': len(conference_df),
+            'csv_bytes': os.path.getsize(conference_csv),
+            'generate_seconds': generate_seconds,
+            'pages_last_report': pages,
+        },
+        'stages': {
+            name: {'median': statistics.median(runs), 'min': min(runs), 'runs': runs}
+            for name, runs in ((name, stages[name]) for name in STAGES)
+        },
+        'cold_start': measure_cold_start(repeat),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Time ScoutingReportGenerator stages on synthetic conference data.")
+    parser.add_argument('--scale', choices=sorted(SCALES), action='append',
+                        help="Preset data size; may be repeated (default: conference)")
+    parser.add_argument('--teams', type=int, help="Custom number of teams")
+    parser.add_argument('--pitchers', type=int, default=20, help="Pitchers per custom team")
+    parser.add_argument('--report-teams', type=int, default=1,
+                        help="Teams rendered for the flowable and doc.build stages")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per stage")
+    parser.add_argument('--seed', type=int, default=2025)
+    parser.add_argument('--write-csv', default=None,
+                        help="Only write a synthetic conference CSV to this path and exit")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Append results as JSON lines to this file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    if args.teams:
+        sizes = [('custom', (args.teams, args.pitchers))]
+    else:
+        sizes = [(scale, SCALES[scale]) for scale in (args.scale or ['conference'])]
+
+    if args.write_csv:
+        teams, pitchers = sizes[0][1]
+        write_conference_csv(make_synthetic_conference(teams, pitchers, args.seed), args.write_csv)
+        return
+
+    for scale, (teams, pitchers) in sizes:
+        result = run_benchmark(teams, pitchers, args.report_teams, args.repeat, args.seed)
+        result['scale'] = scale
+        line = json.dumps(result)
+        if args.output:
+            with open(args.output, 'a') as f:
+                f.write(line + '\n')
+        else:
+            print(line)
+
+        summary = ', '.join(f"{name} {stage['median']:.3f}s" for name, stage in result['stages'].items())
+        print(f"[{scale}] {result['data']['pitchers']} pitchers: {summary}", file=sys.stderr)
+        cold = ', '.join(f"{name} {timing['median']:.3f}s" for name, timing in result['cold_start'].items())
+        print(f"[{scale}] cold start: {cold}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
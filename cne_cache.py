@@ -0,0 +1,215 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+# Bump whenever the way frames are parsed or typed changes, so stale
+# cache entries are rebuilt instead of being read back
+CACHE_VERSION = 4
+
+DEFAULT_CACHE_DIR = '.report_cache'
+
+# Rendered page fragments kept on disk before the least recently used are pruned
+DEFAULT_BYTES_LIMIT = 256 * 2 ** 20
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_info(path):
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _entry_dir(cache_dir, path, variant):
+    path_key = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{path_key}-{variant}")
+
+
+def _write_frame(df, directory):
+    """Write a frame as one .npy file per column plus a JSON column manifest."""
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        base = f"col{i}"
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            np.save(os.path.join(directory, base + '.codes.npy'), series.cat.codes.to_numpy())
+            columns.append({'name': name, 'kind': 'categorical', 'file': base,
+                            'categories': [str(c) for c in dtype.categories],
+                            'ordered': bool(dtype.ordered)})
+        elif isinstance(dtype, pd.api.extensions.ExtensionDtype) and hasattr(series.array, '_data'):
+            # Nullable integer / boolean arrays: values plus a missing-value mask
+            np.save(os.path.join(directory, base + '.npy'), series.array._data)
+            np.save(os.path.join(directory, base + '.mask.npy'), series.array._mask)
+            columns.append({'name': name, 'kind': 'masked', 'file': base, 'dtype': str(dtype)})
+        elif dtype.kind in 'biuf':
+            np.save(os.path.join(directory, base + '.npy'), series.to_numpy())
+            columns.append({'name': name, 'kind': 'numpy', 'file': base})
+        else:
+            # Text columns are stored dictionary-encoded
+            codes, uniques = pd.factorize(series, use_na_sentinel=True)
+            np.save(os.path.join(directory, base + '.codes.npy'), codes)
+            columns.append({'name': name, 'kind': 'text', 'file': base,
+                            'categories': [str(u) for u in uniques], 'dtype': str(dtype)})
+
+    np.save(os.path.join(directory, 'index.npy'), np.asarray(df.index, dtype=np.int64))
+    return columns
+
+
+def _read_frame(directory, columns, mmap_mode='r'):
+    """Read a frame written by ``_write_frame``; numeric columns are memory-mapped."""
+    data = {}
+    for column in columns:
+        base = os.path.join(directory, column['file'])
+        kind = column['kind']
+        if kind == 'numpy':
+            data[column['name']] = np.load(base + '.npy', mmap_mode=mmap_mode)
+        elif kind == 'masked':
+            values = np.load(base + '.npy', mmap_mode=mmap_mode)
+            mask = np.load(base + '.mask.npy', mmap_mode=mmap_mode)
+            array_type = pd.api.types.pandas_dtype(column['dtype']).construct_array_type()
+            data[column['name']] = array_type(values, mask)
+        else:
+            codes = np.load(base + '.codes.npy')
+            categorical = pd.Categorical.from_codes(codes, column['categories'],
+                                                    ordered=column.get('ordered', False))
+            if kind == 'text':
+                data[column['name']] = pd.Series(categorical).astype(column['dtype']).array
+            else:
+                data[column['name']] = categorical
+
+    index = pd.Index(np.load(os.path.join(directory, 'index.npy')))
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def _read_manifest(entry):
+    try:
+        with open(os.path.join(entry, 'current.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cached_frame(path, build, variant='frame', cache_dir=DEFAULT_CACHE_DIR):
+    """Return ``build(path)``, reusing a columnar on-disk copy when the source is unchanged.
+
+    Entries are keyed on the source path and validated against its size,
+    mtime and SHA-256, so a CSV rewritten by the R pipeline is re-parsed
+    automatically. With ``cache_dir=None`` the cache is bypassed.
+    """
+    if cache_dir is None:
+        return build(path)
+
+    entry = _entry_dir(cache_dir, path, variant)
+    source = _source_info(path)
+    manifest = _read_manifest(entry)
+    digest = None
+
+    if manifest is not None and manifest.get('version') == CACHE_VERSION:
+        cached_source = manifest['source']
+        unchanged = (cached_source['size'] == source['size']
+                     and cached_source['mtime_ns'] == source['mtime_ns'])
+        if not unchanged and cached_source['size'] == source['size']:
+            # Touched but possibly identical: fall back to the content hash
+            digest = file_digest(path)
+            unchanged = digest == cached_source['sha256']
+        if unchanged:
+            try:
+                return _read_frame(os.path.join(entry, manifest['data']), manifest['columns'])
+            except (OSError, ValueError, KeyError):
+                pass
+
+    df = build(path)
+
+    source['sha256'] = digest or file_digest(path)
+    os.makedirs(entry, exist_ok=True)
+    data_dir = tempfile.mkdtemp(prefix=source['sha256'][:12] + '-', dir=entry)
+    columns = _write_frame(df, data_dir)
+    new_manifest = {'version': CACHE_VERSION, 'source': source,
+                    'data': os.path.basename(data_dir), 'columns': columns}
+
+    # Publish atomically so concurrent readers never see a half-written entry
+    fd, tmp_manifest = tempfile.mkstemp(suffix='.json', dir=entry)
+    with os.fdopen(fd, 'w') as f:
+        json.dump(new_manifest, f)
+    os.replace(tmp_manifest, os.path.join(entry, 'current.json'))
+
+    if manifest is not None and manifest.get('data') and manifest['data'] != new_manifest['data']:
+        shutil.rmtree(os.path.join(entry, manifest['data']), ignore_errors=True)
+
+    return df
+
+
+def load_bytes(key, namespace='pages', cache_dir=DEFAULT_CACHE_DIR):
+    """Cached bytes for a content-hash key, or None if there is no entry."""
+    path = os.path.join(cache_dir, namespace, key)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        # A hit counts as a use for prune_bytes
+        os.utime(path)
+    except OSError:
+        return None
+    return data
+
+
+def store_bytes(key, data, namespace='pages', cache_dir=DEFAULT_CACHE_DIR):
+    """Atomically write bytes under a content-hash key."""
+    directory = os.path.join(cache_dir, namespace)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, os.path.join(directory, key))
+
+
+def cached_bytes(key, build, namespace='pages', cache_dir=DEFAULT_CACHE_DIR):
+    """Return ``(build(), False)`` or ``(cached bytes, True)`` for a content-hash key."""
+    if cache_dir is None:
+        return build(), False
+
+    data = load_bytes(key, namespace, cache_dir)
+    if data is not None:
+        return data, True
+
+    data = build()
+    store_bytes(key, data, namespace, cache_dir)
+    return data, False
+
+
+def prune_bytes(namespace='pages', cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_BYTES_LIMIT):
+    """Delete the least recently used entries until ``namespace`` holds at most ``max_bytes``.
+
+    Content-hash keys are never overwritten, so every stat update or layout
+    change leaves the old entries behind; this bounds what they add up to.
+    Returns the number of bytes removed.
+    """
+    try:
+        entries = [entry for entry in os.scandir(os.path.join(cache_dir, namespace))
+                   if entry.is_file(follow_symlinks=False)]
+    except OSError:
+        return 0
+    stats = [(entry.stat(), entry.path) for entry in entries]
+    total = sum(st.st_size for st, _ in stats)
+    removed = 0
+    for st, path in sorted(stats, key=lambda item: item[0].st_mtime_ns):
+        if total - removed <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        removed += st.st_size
+    return removed
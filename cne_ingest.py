@@ -0,0 +1,193 @@
+import argparse
+import glob
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from cne_pitching_reports import (
+    DERIVED_COLUMNS, PITCHING_SCHEMA, ROW_MAIN, ROW_SPLIT, TEAM_FILE_PATTERN, _CSV_DTYPES,
+    load_pitching_data, team_name_for,
+)
+
+
+# Columns every team file from cne_team_stats.R must have; the rate stats are derived
+REQUIRED_COLUMNS = [column for column in PITCHING_SCHEMA if column not in DERIVED_COLUMNS]
+
+# ``frame`` is every team combined, ``teams`` the per-team slices keyed by
+# team_id, ``sources`` the file each team came from
+TeamDataset = namedtuple('TeamDataset', ['frame', 'teams', 'sources'])
+
+
+class ValidationError(ValueError):
+    """One or more team files failed validation; ``problems`` lists each failure."""
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__(f"{len(problems)} problem(s) in the team files:\n"
+                         + '\n'.join(f"  - {problem}" for problem in problems))
+
+
+def _examples(values, limit=3):
+    values = list(dict.fromkeys(map(str, values)))
+    more = f" (+{len(values) - limit} more)" if len(values) > limit else ''
+    return ', '.join(values[:limit]) + more
+
+
+def validate_team_frame(df, source):
+    """Vectorized checks of one classified team frame; returns a list of problems."""
+    problems = []
+    missing = [column for column in PITCHING_SCHEMA if column not in df.columns]
+    if missing:
+        return [f"{source}: missing columns {', '.join(missing)}"]
+
+    team_ids = pd.unique(df['team_id'])
+    if len(team_ids) != 1:
+        problems.append(f"{source}: expected one team_id, found {_examples(team_ids)}")
+    years = df['year'].dropna().unique()
+    if len(years) > 1:
+        problems.append(f"{source}: rows from several seasons ({_examples(years)})")
+
+    row_type = df['row_type'].to_numpy()
+    main = df[row_type == ROW_MAIN]
+    if main.empty:
+        problems.append(f"{source}: no pitcher season lines (numeric jersey numbers)")
+
+    duplicated = main['player'][main['player'].duplicated()]
+    if len(duplicated):
+        problems.append(f"{source}: duplicate pitchers {_examples(duplicated)}")
+
+    splits = df[row_type == ROW_SPLIT]
+    orphans = splits['player'][~splits['player'].isin(main['player'])]
+    if len(orphans):
+        problems.append(f"{source}: split rows without a season line for {_examples(orphans)}")
+
+    known = splits[splits['situation'].notna().to_numpy()]
+    repeated = known[known.duplicated(['player', 'situation'])]
+    if len(repeated):
+        pairs = repeated['player'].astype(str) + ' / ' + repeated['situation'].astype(str)
+        problems.append(f"{source}: repeated split rows {_examples(pairs)}")
+    return problems
+
+
+def _parse_problems(path, exc):
+    """Which columns of ``path`` the typed parse choked on, one problem per column."""
+    try:
+        raw = pd.read_csv(path, usecols=lambda column: column in PITCHING_SCHEMA, dtype=str)
+    except (OSError, ValueError, UnicodeDecodeError) as raw_exc:
+        return [f"{path}: unreadable ({raw_exc})"]
+    problems = []
+    for column, dtype in _CSV_DTYPES.items():
+        # Categories take any text, and 'string' columns are coerced leniently
+        if dtype in ('category', 'string') or column not in raw.columns:
+            continue
+        numbers = pd.to_numeric(raw[column], errors='coerce')
+        bad = (raw[column].notna() & numbers.isna()).to_numpy()
+        if bad.any():
+            problems.append(f"{path}: column {column}: non-numeric value {_examples(raw[column][bad])}")
+            continue
+        if dtype.startswith('Int'):
+            bad = (numbers.notna() & (numbers % 1 != 0)).to_numpy()
+            if bad.any():
+                problems.append(f"{path}: column {column}: non-integer value {_examples(raw[column][bad])}")
+    return problems or [f"{path}: unreadable ({exc})"]
+
+
+def _load_team_file(path, cache_dir):
+    # Read and parse errors become problems of this file, so one bad file
+    # is reported alongside every other one instead of ending the run
+    try:
+        header = pd.read_csv(path, nrows=0).columns
+    except (OSError, ValueError, UnicodeDecodeError) as exc:
+        return path, None, [f"{path}: unreadable ({exc})"]
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        return path, None, [f"{path}: missing columns {', '.join(missing)}"]
+    try:
+        df = load_pitching_data(path, cache_dir)
+    except (ValueError, TypeError, OverflowError) as exc:
+        return path, None, _parse_problems(path, exc)
+    return path, df, validate_team_frame(df, path)
+
+
+def _combine(frames):
+    """Concatenate typed frames, unifying categoricals so they stay categorical."""
+    frames = list(frames)
+    for column, dtype in PITCHING_SCHEMA.items():
+        if dtype != 'category':
+            continue
+        categories = pd.Index(sorted(set().union(*(frame[column].cat.categories for frame in frames))))
+        unified = pd.CategoricalDtype(categories)
+        frames = [frame.assign(**{column: frame[column].astype(unified)}) for frame in frames]
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_team_files(paths, cache_dir=None, max_workers=None):
+    """Load and validate team files concurrently; returns a TeamDataset.
+
+    Files are parsed on a thread pool (the CSV parser releases the GIL),
+    so a directory refreshes in about the time of its slowest file. Every
+    file is checked before anything is returned, and all problems are
+    reported together in one ValidationError. Teams are identified by
+    their ``team_id`` column, not by file name.
+    """
+    paths = list(paths)
+    if not paths:
+        raise FileNotFoundError("No team files to load")
+    with ThreadPoolExecutor(max_workers=max_workers or min(32, len(paths))) as pool:
+        results = list(pool.map(lambda path: _load_team_file(path, cache_dir), paths))
+
+    problems = [problem for _, _, file_problems in results for problem in file_problems]
+    sources = {}
+    for path, df, file_problems in results:
+        if file_problems:
+            continue
+        team_id = int(df['team_id'].iloc[0])
+        if team_id in sources:
+            problems.append(f"team_id {team_id} is in both {sources[team_id]} and {path}")
+        sources[team_id] = path
+    if problems:
+        raise ValidationError(problems)
+
+    frame = _combine(df for _, df, _ in results)
+    team_ids = frame['team_id'].to_numpy()
+    teams = {team_id: frame[team_ids == team_id].reset_index(drop=True)
+             for team_id in sorted(sources)}
+    return TeamDataset(frame, teams, sources)
+
+
+def load_team_directory(directory, pattern=TEAM_FILE_PATTERN, cache_dir=None, max_workers=None):
+    """``load_team_files`` for every file in ``directory`` matching ``pattern``."""
+    paths = sorted(glob.glob(os.path.join(directory, pattern)))
+    if not paths:
+        raise FileNotFoundError(f"No '{pattern}' files in {directory}")
+    return load_team_files(paths, cache_dir, max_workers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Load and validate a directory of team pitching CSVs.")
+    parser.add_argument('directory')
+    parser.add_argument('--pattern', default=TEAM_FILE_PATTERN)
+    parser.add_argument('-j', '--threads', type=int, default=None,
+                        help="Files parsed at once (default: one thread per file, up to 32)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        dataset = load_team_directory(args.directory, args.pattern, max_workers=args.threads)
+    except ValidationError as exc:
+        raise SystemExit(str(exc))
+    elapsed = time.perf_counter() - start
+    for team_id, path in sorted(dataset.sources.items()):
+        team = dataset.teams[team_id]
+        pitchers = int(np.sum(team['row_type'].to_numpy() == ROW_MAIN))
+        print(f"{team_id}  {team_name_for(team_id, path):<16} {pitchers:>3} pitchers  {path}")
+    print(f"{len(dataset.sources)} team(s), {len(dataset.frame)} rows in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import hashlib
+import os
+from functools import lru_cache
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.shapes import Drawing, Circle, Group, Line, String
+from reportlab.lib import colors
+from reportlab.lib.attrmap import AttrMap, AttrMapValue
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.lib.validators import isListOfStrings
+from reportlab.pdfgen.canvas import Canvas
+from reportlab.platypus import SimpleDocTemplate, TableStyle
+
+from cne_report_formats import percentile_band_rgb, percentile_rgb
+
+
+# ReportLab styling and layout helpers for the PDF report. Everything that
+# needs ReportLab lives here so the stats layer in cne_pitching_reports
+# imports without it; the generator imports this module when it renders.
+
+
+def report_styles():
+    """Sample stylesheet plus the report's title, player name and section styles."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=colors.HexColor('#1f4788'),
+        spaceAfter=30,
+        alignment=TA_CENTER
+    ))
+
+    styles.add(ParagraphStyle(
+        name='PlayerName',
+        parent=styles['Heading2'],
+        fontSize=18,
+        textColor=colors.HexColor('#c41e3a'),
+        spaceAfter=10
+    ))
+
+    styles.add(ParagraphStyle(
+        name='SectionHeader',
+        parent=styles['Heading3'],
+        fontSize=14,
+        textColor=colors.HexColor('#1f4788'),
+        spaceAfter=8
+    ))
+    return styles
+
+
+def new_doc(output, **kwargs):
+    """Letter-size document with the report's half-inch margins and compressed pages."""
+    return SimpleDocTemplate(output, pagesize=letter,
+                             rightMargin=0.5 * inch, leftMargin=0.5 * inch,
+                             topMargin=0.5 * inch, bottomMargin=0.5 * inch,
+                             pageCompression=1, **kwargs)
+
+
+# Percentile bar geometry
+PERCENTILE_BAR_LENGTH = 580
+PERCENTILE_BAR_START_X = 80
+PERCENTILE_BAR_END_X = PERCENTILE_BAR_START_X + PERCENTILE_BAR_LENGTH
+PERCENTILE_GREY = colors.HexColor('#9b9b9b')
+# Stroke width of the bootstrap band drawn behind each marker
+PERCENTILE_BAND_WIDTH = 10
+# The bars are laid out in the same units as the HTML preview's SVG and
+# drawn at this scale, so they fit the page width at their natural size
+PERCENTILE_DRAWING_SCALE = 0.6
+
+
+@lru_cache(maxsize=None)
+def percentile_bar_background(labels):
+    """Static part of the percentile bars (lines, 0/50/100 markers, labels), built once per label set."""
+    group = Group()
+    y_position = 35 * len(labels) - 30
+
+    for stat_label in labels:
+        # Background line
+        line = Line(PERCENTILE_BAR_START_X, y_position, PERCENTILE_BAR_END_X, y_position)
+        line.strokeColor = PERCENTILE_GREY
+        line.strokeWidth = 2
+        group.add(line)
+
+        # Markers at 0, 50, 100
+        for marker_pct in [0, 50, 100]:
+            x_pos = PERCENTILE_BAR_START_X + (marker_pct / 100) * PERCENTILE_BAR_LENGTH
+            circle = Circle(x_pos, y_position, 4)
+            circle.fillColor = PERCENTILE_GREY
+            circle.strokeColor = PERCENTILE_GREY
+            group.add(circle)
+
+        label = String(10, y_position - 4, stat_label)
+        label.fontSize = 11
+        label.fontName = 'Helvetica-Oblique'
+        label.fillColor = colors.black
+        group.add(label)
+
+        y_position -= 35
+    return group
+
+
+class PercentileBarsDrawing(Drawing):
+    """Percentile bars whose static background is a form XObject shared by every page.
+
+    The background for a label set is defined once per document and
+    painted with a single ``Do``; only the markers go into each page's
+    content stream. Identical forms in separately rendered fragments are
+    merged into one object by the PdfMerger.
+    """
+
+    _attrMap = AttrMap(BASE=Drawing, labels=AttrMapValue(isListOfStrings, desc="Stat labels, top to bottom"))
+
+    def __init__(self, labels, **kwargs):
+        super().__init__(PERCENTILE_DRAWING_SCALE * (PERCENTILE_BAR_END_X + 50),
+                         PERCENTILE_DRAWING_SCALE * 35 * len(labels), **kwargs)
+        self.labels = labels
+        self.scale(PERCENTILE_DRAWING_SCALE, PERCENTILE_DRAWING_SCALE)
+
+    def _drawOn(self, canvas):
+        key = repr((self.labels, self.transform)).encode('utf-8')
+        name = 'PercentileBars' + hashlib.md5(key).hexdigest()[:16]
+        if not canvas.hasForm(name):
+            background = Drawing(self.width, self.height)
+            background.add(percentile_bar_background(self.labels))
+            background.transform = self.transform
+            canvas.beginForm(name, 0, 0, self.width, self.height + self.transform[5])
+            renderPDF.draw(background, canvas, 0, 0)
+            canvas.endForm()
+        canvas.doForm(name)
+        super()._drawOn(canvas)
+
+
+@lru_cache(maxsize=None)
+def team_logo(path):
+    """Decoded logo image, read once per process and shared by every document."""
+    if not os.path.exists(path):
+        return None
+    logo = ImageReader(path)
+    logo.getRGBData()
+    return logo
+
+
+# Header logo box, top right of every page (points)
+LOGO_SIZE = 0.55 * inch
+LOGO_TOP_MARGIN = 0.3 * inch
+
+
+@lru_cache(maxsize=101)
+def percentile_color(percentile):
+    """Blue (0) - white (50) - red (100) gradient for a percentile marker."""
+    r, g, b = percentile_rgb(percentile)
+    return colors.Color(r / 255, g / 255, b / 255)
+
+
+def percentile_band_color(percentile):
+    """Muted ``percentile_color`` for the band behind a marker."""
+    r, g, b = percentile_band_rgb(percentile)
+    return colors.Color(r / 255, g / 255, b / 255)
+
+
+# Table styles shared by every page
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 14),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black)
+])
+
+PRIMARY_STATS_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#c41e3a')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('LEADING', (0, 0), (-1, -1), 8.5),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.white),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+])
+
+SITUATIONAL_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+    ('ALIGN', (0, 1), (0, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('LEADING', (0, 0), (-1, -1), 8.5),
+    ('TOPPADDING', (0, 0), (-1, -1), 2),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+])
+
+NOTES_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#c41e3a')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('VALIGN', (0, 1), (-1, -1), 'TOP'),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+])
+
+PAGE_LAYOUT_STYLE = TableStyle([
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 4),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+])
+
+
+def profiled_canvas(profiler):
+    """Canvas class whose final PDF serialization is timed by ``profiler``."""
+
+    class ProfiledCanvas(Canvas):
+        def save(self):
+            with profiler.stage('pdf_serialize'):
+                super().save()
+
+    return ProfiledCanvas
@@ -0,0 +1,226 @@
+import hashlib
+import re
+
+
+_OBJ_RE = re.compile(rb'(\d+) 0 obj\s')
+_REF_RE = re.compile(rb'(\d+) 0 R')
+_LENGTH_RE = re.compile(rb'/Length (\d+)')
+_TYPE_RE = re.compile(rb'/Type /(\w+)')
+
+
+def _parse_objects(data):
+    """Split a ReportLab-generated PDF into {number: (dictionary, stream)}.
+
+    Only handles the classic xref-table layout ReportLab writes (no object
+    streams or incremental updates), which is all the merger is fed.
+    """
+    objects = {}
+    pos = 0
+    while True:
+        match = _OBJ_RE.search(data, pos)
+        if match is None:
+            break
+        start = match.end()
+        end = data.find(b'endobj', start)
+        stream_start = data.find(b'stream', start, end)
+        if stream_start != -1:
+            header = data[start:stream_start]
+            length = int(_LENGTH_RE.search(header).group(1))
+            body_start = stream_start + len(b'stream')
+            body_start += 2 if data[body_start:body_start + 2] == b'\r\n' else 1
+            stream = data[body_start:body_start + length]
+            end = data.find(b'endobj', body_start + length)
+        else:
+            header = data[start:end]
+            stream = None
+        objects[int(match.group(1))] = (header.strip(), stream)
+        pos = end + len(b'endobj')
+
+    trailer = data[data.rfind(b'trailer'):]
+    root = int(re.search(rb'/Root (\d+) 0 R', trailer).group(1))
+    return objects, root
+
+
+def _kids(objects, pages_number):
+    kids = []
+    header = objects[pages_number][0]
+    kids_list = re.search(rb'/Kids\s*\[([^\]]*)\]', header).group(1)
+    for ref in _REF_RE.finditer(kids_list):
+        number = int(ref.group(1))
+        if _TYPE_RE.search(objects[number][0]).group(1) == b'Pages':
+            kids.extend(_kids(objects, number))
+        else:
+            kids.append(number)
+    return kids
+
+
+def count_pages(data):
+    """Number of pages in a ReportLab-generated PDF."""
+    objects, root = _parse_objects(data)
+    pages_number = int(re.search(rb'/Pages (\d+) 0 R', objects[root][0]).group(1))
+    return len(_kids(objects, pages_number))
+
+
+def _pdf_string(text):
+    escaped = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return b'(' + escaped.encode('latin-1', 'replace') + b')'
+
+
+class PdfMerger:
+    """Concatenate ReportLab page fragments into one PDF, writing as it goes.
+
+    Objects shared between fragments (fonts, images, repeated drawings)
+    are written once and referenced from every page. Only object offsets
+    and content hashes are kept in memory, so a book of any length is
+    assembled with flat memory. Output depends only on the fragments and
+    the outline, so the same inputs always give the same bytes.
+    """
+
+    PAGES_NUMBER = 1
+    CATALOG_NUMBER = 2
+
+    def __init__(self, output):
+        self._file = open(output, 'wb') if isinstance(output, str) else output
+        self._owns_file = isinstance(output, str)
+        self._offsets = {}
+        self._next_number = 3
+        self._shared = {}
+        self._page_numbers = []
+        self._bookmarks = []
+        self._digest = hashlib.md5()
+        self._write(b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+
+    @property
+    def page_count(self):
+        return len(self._page_numbers)
+
+    def _write(self, data):
+        self._file.write(data)
+        self._digest.update(data)
+
+    def _write_object(self, number, header, stream=None):
+        self._offsets[number] = self._file.tell()
+        parts = [b'%d 0 obj\n' % number, header]
+        if stream is not None:
+            parts += [b'\nstream\n', stream, b'endstream']
+        parts.append(b'\nendobj\n')
+        self._write(b''.join(parts))
+
+    def _allocate(self):
+        number = self._next_number
+        self._next_number += 1
+        return number
+
+    def add_fragment(self, data):
+        """Append every page of a ReportLab PDF (bytes); returns the first new page index."""
+        objects, root = _parse_objects(data)
+        pages_number = int(re.search(rb'/Pages (\d+) 0 R', objects[root][0]).group(1))
+        first_page = len(self._page_numbers)
+        mapping = {pages_number: self.PAGES_NUMBER}
+        page_objects = _kids(objects, pages_number)
+
+        for number in page_objects:
+            mapping[number] = self._allocate()
+            self._page_numbers.append(mapping[number])
+
+        resolving = set()
+
+        def resolve(number):
+            if number in mapping:
+                return mapping[number]
+            if number in resolving:
+                # Reference cycle outside the page tree: give up on sharing it
+                mapping[number] = self._allocate()
+                return mapping[number]
+            resolving.add(number)
+            header, stream = objects[number]
+            header = _REF_RE.sub(lambda m: b'%d 0 R' % resolve(int(m.group(1))), header)
+            resolving.discard(number)
+            if number in mapping:
+                self._write_object(mapping[number], header, stream)
+                return mapping[number]
+
+            key = hashlib.sha1(header + b'\0' + (stream or b'')).digest()
+            if key not in self._shared:
+                self._shared[key] = self._allocate()
+                self._write_object(self._shared[key], header, stream)
+            mapping[number] = self._shared[key]
+            return mapping[number]
+
+        for number in page_objects:
+            header, stream = objects[number]
+            header = _REF_RE.sub(lambda m: b'%d 0 R' % resolve(int(m.group(1))), header)
+            self._write_object(mapping[number], header, stream)
+
+        return first_page
+
+    def add_bookmark(self, title, page_index, parent=None):
+        """Add an outline entry pointing at a page; returns an id usable as ``parent``."""
+        self._bookmarks.append({'title': title, 'page': page_index, 'children': []})
+        bookmark_id = len(self._bookmarks) - 1
+        if parent is not None:
+            self._bookmarks[parent]['children'].append(bookmark_id)
+        else:
+            self._bookmarks[bookmark_id]['top_level'] = True
+        return bookmark_id
+
+    def _write_outline(self):
+        top_level = [i for i, b in enumerate(self._bookmarks) if b.get('top_level')]
+        if not top_level:
+            return None
+
+        outline_number = self._allocate()
+        numbers = [self._allocate() for _ in self._bookmarks]
+
+        def write_level(ids, parent_number):
+            for position, bookmark_id in enumerate(ids):
+                bookmark = self._bookmarks[bookmark_id]
+                entries = [b'/Title ' + _pdf_string(bookmark['title']),
+                           b'/Parent %d 0 R' % parent_number,
+                           b'/Dest [ %d 0 R /Fit ]' % self._page_numbers[bookmark['page']]]
+                if position > 0:
+                    entries.append(b'/Prev %d 0 R' % numbers[ids[position - 1]])
+                if position < len(ids) - 1:
+                    entries.append(b'/Next %d 0 R' % numbers[ids[position + 1]])
+                children = bookmark['children']
+                if children:
+                    entries.append(b'/First %d 0 R /Last %d 0 R /Count -%d'
+                                   % (numbers[children[0]], numbers[children[-1]], len(children)))
+                    write_level(children, numbers[bookmark_id])
+                self._write_object(numbers[bookmark_id], b'<<\n' + b' '.join(entries) + b'\n>>')
+
+        write_level(top_level, outline_number)
+        self._write_object(outline_number, b'<<\n/Count %d /First %d 0 R /Last %d 0 R /Type /Outlines\n>>'
+                           % (len(top_level), numbers[top_level[0]], numbers[top_level[-1]]))
+        return outline_number
+
+    def close(self, title=None):
+        """Write the page tree, outline, catalog and cross-reference table."""
+        kids = b' '.join(b'%d 0 R' % number for number in self._page_numbers)
+        self._write_object(self.PAGES_NUMBER, b'<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>'
+                           % (len(self._page_numbers), kids))
+
+        catalog = b'/Pages %d 0 R /Type /Catalog' % self.PAGES_NUMBER
+        outline_number = self._write_outline()
+        if outline_number is not None:
+            catalog += b' /Outlines %d 0 R /PageMode /UseOutlines' % outline_number
+        self._write_object(self.CATALOG_NUMBER, b'<<\n' + catalog + b'\n>>')
+
+        info_number = self._allocate()
+        info = b'/Producer (ReportLab PDF Library - cne_pdf_merge)'
+        if title:
+            info += b' /Title ' + _pdf_string(title)
+        self._write_object(info_number, b'<<\n' + info + b'\n>>')
+
+        doc_id = self._digest.hexdigest().encode('ascii')
+        xref_offset = self._file.tell()
+        lines = [b'xref\n0 %d\n' % self._next_number, b'0000000000 65535 f \n']
+        for number in range(1, self._next_number):
+            lines.append(b'%010d 00000 n \n' % self._offsets[number])
+        lines.append(b'trailer\n<<\n/ID [<%s><%s>] /Info %d 0 R /Root %d 0 R /Size %d\n>>\n'
+                     % (doc_id, doc_id, info_number, self.CATALOG_NUMBER, self._next_number))
+        lines.append(b'startxref\n%d\n%%%%EOF\n' % xref_offset)
+        self._file.write(b''.join(lines))
+
+        if self._owns_file:
+            self._file.close()
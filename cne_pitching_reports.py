@@ -1,187 +1,1108 @@
+import numpy as np
 import pandas as pd
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
-from reportlab.graphics.shapes import Drawing, Circle, Line, String
-from reportlab.graphics.charts.linecharts import HorizontalLineChart
-from reportlab.graphics.widgets.markers import makeMarker
 from datetime import datetime
+from collections import namedtuple
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import copy
+import glob
+import hashlib
+import io
+import json
 import os
-from reportlab.platypus import Table, TableStyle, KeepInFrame
-from reportlab.lib import colors
+import sys
+
+from cne_cache import (
+    DEFAULT_CACHE_DIR, cached_bytes, cached_frame, file_digest, load_bytes, prune_bytes, store_bytes,
+)
+from cne_pdf_merge import PdfMerger, count_pages
+from cne_report_formats import format_stat, json_value, render_html, render_json
+from cne_shared import SharedPayload, load_shared
+from cne_profiling import NULL_PROFILER, StageProfiler, format_summary, write_trace
+
+
+# File stems used by cne_team_stats.R for the teams we know by id
+TEAM_NAMES = {
+    597157: 'endicott',
+    597109: 'gordon',
+    597070: 'wne',
+    597017: 'rogerwilliams',
+    596977: 'hartford',
+}
+
+# Per-team files written by cne_team_stats.R (<stem>_pitching.csv); other
+# teams are named by the stem of their file in one of TEAM_FILE_DIRS
+TEAM_FILE_PATTERN = '*_pitching.csv'
+TEAM_FILE_DIRS = ['.', os.path.dirname(os.path.abspath(__file__))]
+
+# Team logos drawn in the page header: team_logos/<stem>_logo.png for the
+# stem a team_id resolves to (team_names), where a few teams use a shorter
+# logo stem than their CSV file name
+TEAM_LOGO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'team_logos')
+TEAM_LOGO_STEMS = {
+    'rogerwilliams': 'rwu',
+    'westernnewengland': 'wne',
+    'johnsonwales': 'jwu',
+}
+
+
+# Row types in the pitching CSVs: a pitcher's season line (numeric jersey
+# number), one of their situational splits, or a team/opponent totals row
+ROW_MAIN = 'main'
+ROW_SPLIT = 'split'
+ROW_TOTALS = 'totals'
+ROW_TYPES = [ROW_MAIN, ROW_SPLIT, ROW_TOTALS]
+
+PlayerRows = namedtuple('PlayerRows', ['main', 'splits'])
+
+
+def classify_rows(df):
+    """Label every row of a pitching frame as a main, split or totals row."""
+    number = df['number'].astype(str)
+    is_main = number.str.match(r'^\d+$', na=False).to_numpy()
+    is_totals = ((number == '-') | df['player'].isin(['Totals', 'Opponent Totals'])).to_numpy()
+    row_type = np.where(is_main, ROW_MAIN, np.where(is_totals, ROW_TOTALS, ROW_SPLIT))
+    return pd.Categorical(row_type, categories=ROW_TYPES)
+
+
+# Column schema of the pitching CSVs written by cne_team_stats.R. Repeated
+# text fields are categorical and counting stats are nullable small ints;
+# the rate columns are (re)derived on load by derive_pitching_stats.
+_COUNT_COLUMNS = ['app', 'gs', 'cg', 'h', 'r', 'er', 'bb', 'so', 'sho', 'bf',
+                  'x2b_a', 'x3b_a', 'bk', 'hr_a', 'wp', 'hb', 'ibb', 'inh_run',
+                  'inh_run_score', 'sha', 'sfa', 'go', 'fo', 'w', 'l', 'sv', 'kl',
+                  'pickoffs', 'AB', 'x1b_a']
+
+PITCHING_SCHEMA = {
+    'number': 'category',
+    'player': 'category',
+    'yr': 'category',
+    'pos': 'category',
+    'b_t': 'category',
+    'ip': 'float64',
+    'p_oab': 'Int16',
+    'pitches': 'Int32',
+    'team_id': 'int32',
+    'year': 'Int16',
+    **{column: 'Int16' for column in _COUNT_COLUMNS},
+    **{column: 'float64' for column in ['era', 'BAA', 'flyout_perc', 'groundout_perc',
+                                        'k_perc', 'bb_perc', 'obp', 'slg', 'ops']},
+}
+
+# Count columns the scrape quotes as text
+_TEXT_COUNT_COLUMNS = ['p_oab', 'pitches']
+
+# Columns derive_pitching_stats computes from the counts
+DERIVED_COLUMNS = ['AB', 'x1b_a', 'BAA', 'obp', 'slg', 'ops', 'k_perc', 'bb_perc',
+                   'groundout_perc', 'flyout_perc']
+
+
+def ip_to_outs(ip):
+    """Outs recorded from box-score IP (5.2 = 17 outs), NA where IP is missing."""
+    ip = pd.to_numeric(ip, errors='coerce')
+    whole = np.floor(ip)
+    return (whole * 3 + ((ip - whole) * 10).round()).astype('Int16')
+
+
+def derive_pitching_stats(df):
+    """Fill missing counts with zero and compute the rate columns for every row.
+
+    The same formulas cne_team_stats.R applies (OPS is OBP + SLG, as in
+    conference_all_pitchers.csv), evaluated column-wise so main, split and
+    totals rows are derived in one pass. A zero denominator gives inf or
+    NaN exactly as in R. Raw scrapes without the derived columns can be
+    loaded directly.
+    """
+    counts = [column for column in _COUNT_COLUMNS
+              if column in df.columns and column not in DERIVED_COLUMNS]
+    df = df.assign(**{column: df[column].fillna(0) for column in counts})
+
+    def values(column):
+        return df[column].to_numpy(dtype='float64', na_value=np.nan)
+
+    bf, h, bb, hb, so = values('bf'), values('h'), values('bb'), values('hb'), values('so')
+    x2b, x3b, hr = values('x2b_a'), values('x3b_a'), values('hr_a')
+    go, fo, sfa = values('go'), values('fo'), values('sfa')
+
+    ab = bf - (bb + hb + values('ibb') + values('sha') + sfa)
+    x1b = h - (x2b + x3b + hr)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        obp = (h + bb + hb) / (ab + bb + hb + sfa)
+        slg = (x1b + 2 * x2b + 3 * x3b + 4 * hr) / ab
+        derived = {
+            'AB': pd.array(ab, dtype='Int16'),
+            'x1b_a': pd.array(x1b, dtype='Int16'),
+            'BAA': h / ab,
+            'obp': obp,
+            'slg': slg,
+            'ops': obp + slg,
+            'k_perc': so / bf,
+            'bb_perc': bb / bf,
+            'groundout_perc': go / (go + fo),
+            'flyout_perc': fo / (go + fo),
+        }
+    return df.assign(**derived)
 
 
+# The scrape writes these as quoted text, with separators ("1,610" pitches)
+_CSV_DTYPES = dict(PITCHING_SCHEMA, **{column: 'string' for column in _TEXT_COUNT_COLUMNS})
+
 
-class ScoutingReportGenerator:
-    def __init__(self, csv_file, conference_csv=None):
-        self.df = pd.read_csv(csv_file, low_memory=False)
-        self.csv_file = csv_file
+def _prepare_pitching_frame(df, situations=True):
+    for column in _TEXT_COUNT_COLUMNS:
+        if column in df.columns:
+            numbers = pd.to_numeric(df[column].str.replace(',', '', regex=False), errors='coerce')
+            df[column] = numbers.astype(PITCHING_SCHEMA[column])
+    df = derive_pitching_stats(df)
+    df['outs'] = ip_to_outs(df['ip'])
+    df['row_type'] = classify_rows(df)
+    return df.assign(situation=classify_situations(df)) if situations else df
+
+
+def read_pitching_csv(csv_file):
+    """Parse a pitching CSV against PITCHING_SCHEMA, derive its rate stats and classify its rows."""
+    df = pd.read_csv(csv_file, usecols=lambda column: column in PITCHING_SCHEMA, dtype=_CSV_DTYPES)
+    return _prepare_pitching_frame(df)
+
+
+def iter_pitching_csv(csv_file, chunk_rows=100_000):
+    """``read_pitching_csv`` a chunk of rows at a time, without situation codes.
+
+    Every row is classified on its own, so chunks can be processed
+    independently and memory stays bounded by ``chunk_rows``.
+    """
+    reader = pd.read_csv(csv_file, usecols=lambda column: column in PITCHING_SCHEMA,
+                         dtype=_CSV_DTYPES, chunksize=chunk_rows)
+    with reader:
+        for chunk in reader:
+            yield _prepare_pitching_frame(chunk, situations=False)
+
+
+def load_pitching_data(csv_file, cache_dir=None):
+    """Classified pitching frame, served from the on-disk cache when enabled."""
+    return cached_frame(csv_file, read_pitching_csv, 'pitching', cache_dir)
+
+
+def load_conference_data(conference_csv, cache_dir=None):
+    """Read the full conference file, including split and totals rows."""
+    return load_pitching_data(conference_csv, cache_dir)
+
+
+def load_conference_splits(conference_csv, cache_dir=None):
+    """Conference situational split rows only, cached already filtered."""
+    def build(path):
+        df = read_pitching_csv(path)
+        return df[np.asarray(df['row_type'] == ROW_SPLIT)]
+    return cached_frame(conference_csv, build, 'conference-splits', cache_dir)
+
+
+def load_conference_main(conference_csv, cache_dir=None):
+    """Conference season lines only, cached already filtered."""
+    return cached_frame(conference_csv, lambda path: filter_main_rows(read_pitching_csv(path)),
+                        'conference-main', cache_dir)
+
+
+def filter_main_rows(df):
+    """Keep only the season lines (numeric jersey number) of a pitching frame."""
+    row_type = df['row_type'] if 'row_type' in df.columns else classify_rows(df)
+    return df[np.asarray(row_type == ROW_MAIN)]
+
+
+def index_player_rows(df):
+    """Group a classified frame by pitcher into main-line and split-row views.
+
+    The frame is reordered once so each pitcher's main and split rows are
+    contiguous (in their original order); every view is then a positional
+    slice of it instead of its own boolean-mask copy.
+    """
+    codes, players = pd.factorize(df['player'])
+    row_type = df['row_type'].to_numpy()
+    is_split = row_type == ROW_SPLIT
+    kept = (codes >= 0) & ((row_type == ROW_MAIN) | is_split)
+    # Sort key: pitcher in order of appearance, main rows before split rows
+    keys = codes * 2 + is_split
+    order = np.flatnonzero(kept)
+    order = order[np.argsort(keys[order], kind='stable')]
+    grouped = df.take(order)
+    bounds = np.searchsorted(keys[order], np.arange(2 * len(players) + 1))
+
+    player_rows = {}
+    for i, player in enumerate(players):
+        start, middle, end = bounds[2 * i:2 * i + 3]
+        player_rows[player] = PlayerRows(grouped.iloc[start:middle], grouped.iloc[middle:end])
+    return player_rows
+
+
+# Situation code -> label on the player page, in the order the pipeline
+# writes a pitcher's split rows
+SITUATION_LABELS = {
+    'leadoff': 'vs Leadoff',
+    'runners_on': 'Runners On',
+    'vs_lhb': 'vs LHB',
+    'two_outs': '2 Outs',
+    'bases_empty': 'Bases Empty',
+    'risp': 'RISP',
+    'risp_2out': 'RISP 2-Out',
+    'runner_on_2nd': 'Runners on 2nd',
+    'bases_loaded': 'Bases Loaded',
+    'vs_rhb': 'vs RHB',
+}
+
+# Substrings of a split's name tried in order; the first match wins
+_SITUATION_PATTERNS = [
+    ('vs lhb', 'vs_lhb'), ('vs lh', 'vs_lhb'),
+    ('vs rhb', 'vs_rhb'), ('vs rh', 'vs_rhb'),
+    ('with runners ob', 'runners_on'),
+    ('scorepos2', 'risp_2out'),
+    ('scorepos', 'risp'),
+    ('runners2', 'runner_on_2nd'),
+    ('bases loaded', 'bases_loaded'),
+    ('bases empty', 'bases_empty'),
+    ('w2outs', 'two_outs'),
+    ('leadoff', 'leadoff'),
+]
+
+# Split stats kept in the pivot, and those ranked against the conference
+SPLIT_STATS = ['ip', 'outs', 'AB', 'h', 'bb', 'so', 'BAA', 'ops']
+SPLIT_PERCENTILE_STATS = {'BAA': {'lower_better': True}, 'ops': {'lower_better': True}}
+
+# At-bats a split needs to count towards the conference distribution
+SPLIT_MIN_AB = 10
+
+
+def classify_situations(df):
+    """Situation code of every split row (NaN for main/totals rows and unknown splits).
+
+    The name matching runs once per distinct split name, not per row.
+    """
+    names = df['number'].astype('category')
+    codes = []
+    for name in names.cat.categories:
+        lowered = str(name).lower()
+        codes.append(next((code for pattern, code in _SITUATION_PATTERNS if pattern in lowered), None))
+    situation = pd.Series(pd.Categorical(np.asarray(codes, dtype=object)[names.cat.codes.to_numpy()],
+                                         categories=list(SITUATION_LABELS)),
+                          index=df.index)
+    situation[names.cat.codes.to_numpy() == -1] = np.nan
+    return situation.where(np.asarray(df['row_type'] == ROW_SPLIT)).array
+
+
+def split_pivot(df, stats=SPLIT_STATS):
+    """(team_id, player) x (situation, stat) float frame of every classified split row.
+
+    Situations are in SITUATION_LABELS order; a situation a pitcher has
+    no row for is all-NaN, including its AB.
+    """
+    splits = df[np.asarray((df['row_type'] == ROW_SPLIT) & df['situation'].notna())]
+    values = splits[stats].astype('float64').assign(
+        team_id=splits['team_id'].to_numpy(), player=splits['player'].to_numpy(),
+        situation=splits['situation'].to_numpy())
+    table = values.groupby(['team_id', 'player', 'situation'], observed=True, sort=False).first()
+    pivot = table.unstack('situation').swaplevel(axis=1)
+    columns = pd.MultiIndex.from_product([list(SITUATION_LABELS), stats], names=['situation', 'stat'])
+    return pivot.reindex(columns=columns)
+
+
+class SplitPercentileIndex:
+    """Sorted conference distributions per (situation, stat) for split percentiles.
+
+    Same semantics as PercentileIndex, with qualification by at-bats in
+    the split instead of season innings.
+    """
+
+    def __init__(self, conference_pivot, stats_config=SPLIT_PERCENTILE_STATS, min_ab=SPLIT_MIN_AB):
+        self.stats_config = stats_config
+        self.sorted_values = {}
+        for situation in SITUATION_LABELS:
+            qualified = conference_pivot[(situation, 'AB')].to_numpy() >= min_ab
+            for stat in stats_config:
+                values = conference_pivot[(situation, stat)].to_numpy()[qualified]
+                self.sorted_values[situation, stat] = np.sort(values[~np.isnan(values)])
+
+    def batch(self, pivot):
+        """Rounded percentiles for every pitcher and (situation, stat) of a split pivot."""
+        result = {}
+        for (situation, stat), conference_values in self.sorted_values.items():
+            values = pivot[(situation, stat)].to_numpy()
+            if len(conference_values) == 0:
+                result[situation, stat] = np.full(values.shape, np.nan)
+                continue
+            percentile = np.searchsorted(conference_values, values, side='right') / len(conference_values) * 100
+            if self.stats_config[stat]['lower_better']:
+                percentile = 100 - percentile
+            result[situation, stat] = np.where(np.isnan(values), np.nan, np.round(percentile))
+        return pd.DataFrame(result, index=pivot.index)
+
+
+def split_leaderboard(pivot, situation, stat='ops', lower_better=True, min_ab=SPLIT_MIN_AB, top=10):
+    """Best ``top`` pitchers in one situation by one stat, among those with ``min_ab`` at-bats.
+
+    Works on a staff pivot or a whole-conference one alike.
+    """
+    board = pivot[situation][['AB', stat]]
+    board = board[board['AB'] >= min_ab].dropna()
+    board = board.sort_values(stat, ascending=lower_better, kind='mergesort')
+    return board.head(top).reset_index()
+
+
+# Standardized features two pitchers are compared on: season rates plus
+# the platoon splits (OPS against vs LHB / RHB)
+COMPARABLE_STATS = ['k_perc', 'bb_perc', 'groundout_perc', 'BAA', 'ops']
+COMPARABLE_SPLITS = [('vs_lhb', 'ops'), ('vs_rhb', 'ops')]
+
+# Comparable pitchers listed per page, and the innings both sides need
+COMPARABLE_COUNT = 5
+COMPARABLE_MIN_IP = 10
+
+
+def _comparable_features(main_df, splits):
+    """(team_id, player) keys and the raw feature matrix for a frame of main lines."""
+    keys = pd.MultiIndex.from_arrays([main_df['team_id'].to_numpy(dtype='int64'),
+                                      main_df['player'].astype(str).to_numpy()])
+    split_values = splits.reindex(keys)
+    columns = ([_float_values(main_df[stat]) for stat in COMPARABLE_STATS]
+               + [split_values[column].to_numpy(dtype='float64') for column in COMPARABLE_SPLITS])
+    features = np.column_stack(columns)
+    features[~np.isfinite(features)] = np.nan
+    return keys, features
+
+
+class ComparablesIndex:
+    """Standardized feature vectors of every qualified conference pitcher.
+
+    Lookups are batched per staff: one matrix product gives the distance
+    from each of a team's pitchers to the whole pool, so a page only
+    slices a precomputed result and the pool is never re-scanned as a
+    frame. Missing features are imputed at the conference mean.
+    """
+
+    def __init__(self, conference_df, conference_splits, min_ip=COMPARABLE_MIN_IP):
+        qualified = ip_to_innings(_float_values(conference_df['ip'])) >= min_ip
+        main = conference_df[qualified]
+        self.min_ip = min_ip
+        self.keys, features = _comparable_features(main, conference_splits)
+        self.mean = np.nanmean(features, axis=0)
+        std = np.nanstd(features, axis=0)
+        self.std = np.where(np.isfinite(std) & (std > 0), std, 1.0)
+        self.vectors = self._standardize(features)
+        self.sq_norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        self.team_ids = self.keys.get_level_values(0).to_numpy()
+        self.lines = main[['player', 'team_id', 'ip', 'era', 'k_perc', 'bb_perc', 'ops']].reset_index(drop=True)
+
+    def _standardize(self, features):
+        z = (features - np.where(np.isnan(self.mean), 0.0, self.mean)) / self.std
+        return np.where(np.isnan(z), 0.0, z)
+
+    def neighbors(self, main_df, splits, k=COMPARABLE_COUNT):
+        """``{(team_id, player): frame}`` of the ``k`` nearest pitchers on other teams.
+
+        Only pitchers with ``min_ip`` innings are matched; the frame holds
+        the comparables' season lines plus a ``distance`` column.
+        """
+        main_df = main_df[ip_to_innings(_float_values(main_df['ip'])) >= self.min_ip]
+        if main_df.empty or len(self.lines) == 0:
+            return {}
+        keys, features = _comparable_features(main_df, splits)
+        queries = self._standardize(features)
+
+        distances = (np.einsum('ij,ij->i', queries, queries)[:, None] + self.sq_norms[None, :]
+                     - 2 * queries @ self.vectors.T)
+        query_teams = keys.get_level_values(0).to_numpy()
+        distances[query_teams[:, None] == self.team_ids[None, :]] = np.inf
+
+        k = min(k, distances.shape[1])
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(distances, nearest, axis=1).argsort(axis=1, kind='stable')
+        nearest = np.take_along_axis(nearest, order, axis=1)
+
+        result = {}
+        for i, key in enumerate(keys):
+            found = nearest[i][np.isfinite(distances[i, nearest[i]])]
+            rows = self.lines.iloc[found].assign(
+                distance=np.sqrt(np.maximum(distances[i, found], 0.0)))
+            result[int(key[0]), key[1]] = rows.reset_index(drop=True)
+        return result
+
+
+def ip_to_innings(ip):
+    """Vectorized conversion of box-score IP (5.2 = 5 2/3) to fractional innings."""
+    ip = np.asarray(ip, dtype=float)
+    whole = np.floor(ip)
+    return whole + (ip - whole) * 10 / 3
+
+
+def innings_pitched(df):
+    """Fractional innings for every row, from the parsed outs when available."""
+    if 'outs' in df.columns:
+        return _float_values(df['outs']) / 3
+    return ip_to_innings(_float_values(df['ip']))
+
+
+def _float_values(series):
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+
+
+# Stats shown on the percentile bars, with the IP needed to qualify
+PERCENTILE_STATS = {
+    'era': {'lower_better': True, 'label': 'ERA', 'min_ip': 10},
+    'whip': {'lower_better': True, 'label': 'WHIP', 'min_ip': 10},
+    'k_perc': {'lower_better': False, 'label': 'K%', 'min_ip': 10},
+    'bb_perc': {'lower_better': True, 'label': 'BB%', 'min_ip': 10},
+    'BAA': {'lower_better': True, 'label': 'BAA', 'min_ip': 10},
+    'ops': {'lower_better': True, 'label': 'OPS', 'min_ip': 10},
+    'groundout_perc': {'lower_better': False, 'label': 'GB%', 'min_ip': 5},
+}
+
+
+def _stat_values(df, stat):
+    """Column values for a percentile stat, deriving WHIP from h, bb and ip."""
+    if stat == 'whip' and 'whip' not in df.columns:
+        # (h + bb) * 3 / outs keeps equal WHIPs bit-identical, so ties rank as ties
+        outs = _float_values(df['outs']) if 'outs' in df.columns else innings_pitched(df) * 3
+        with np.errstate(divide='ignore', invalid='ignore'):
+            whip = (_float_values(df['h']) + _float_values(df['bb'])) * 3 / outs
+        return np.where(outs > 0, whip, np.nan)
+    if stat not in df.columns:
+        return np.full(len(df), np.nan)
+    return _float_values(df[stat])
+
+
+def _row_value(row, column):
+    try:
+        return float(row[column])
+    except (KeyError, TypeError, ValueError):
+        return np.nan
+
+
+def _row_stat_value(row, stat):
+    """``_stat_values`` for a single stat line (a Series), without building a frame."""
+    if stat == 'whip' and 'whip' not in row.index:
+        if 'outs' in row.index:
+            outs = _row_value(row, 'outs')
+        else:
+            outs = float(ip_to_innings(_row_value(row, 'ip'))) * 3
+        if not outs > 0:
+            return np.nan
+        return (_row_value(row, 'h') + _row_value(row, 'bb')) * 3 / outs
+    return _row_value(row, stat)
+
+
+class PercentileIndex:
+    """Sorted conference distributions for fast percentile lookups.
+
+    One sorted array is built per stat (and qualifier threshold) when the
+    conference data is loaded, so every lookup is a binary search.
+    """
+
+    def __init__(self, conference_df, stats_config=PERCENTILE_STATS):
+        self.stats_config = stats_config
+        self.sorted_values = {stat: np.sort(self._qualified_values(conference_df, stat))
+                              for stat in stats_config}
+
+    def _qualified_values(self, df, stat):
+        ip = _float_values(df['ip'])
+        values = _stat_values(df, stat)[ip >= self.stats_config[stat].get('min_ip', 10)]
+        return values[~np.isnan(values)]
+
+    def replace(self, old_rows, new_rows):
+        """Swap some pitchers' main lines for updated ones, in place.
+
+        ``old_rows`` must be lines the index was built from. Each sorted
+        array is patched by binary search instead of being rebuilt, so
+        this costs in proportion to the changed lines (plus one array
+        copy), not a re-sort of the conference.
+        """
+        for stat, values in self.sorted_values.items():
+            old = np.sort(self._qualified_values(old_rows, stat))
+            # Equal values sit next to each other: remove the i-th of a run at start + i
+            run_offset = np.arange(len(old)) - np.searchsorted(old, old, side='left')
+            values = np.delete(values, np.searchsorted(values, old, side='left') + run_offset)
+            new = np.sort(self._qualified_values(new_rows, stat))
+            self.sorted_values[stat] = np.insert(values, np.searchsorted(values, new), new)
+
+    def size(self, stat):
+        """Number of qualified conference values for a stat."""
+        return len(self.sorted_values[stat])
+
+    def rank_fraction(self, stat, values):
+        """Fraction of the qualified conference values ``<=`` each of ``values``."""
+        conference_values = self.sorted_values[stat]
+        return np.searchsorted(conference_values, values, side='right') / len(conference_values)
+
+    def percentile_array(self, stat, values):
+        """Unrounded percentiles for an array of values (NaN where undefined)."""
+        values = np.asarray(values, dtype=float)
+        if self.size(stat) == 0:
+            return np.full(values.shape, np.nan)
+
+        percentile = self.rank_fraction(stat, values) * 100
+        if self.stats_config[stat]['lower_better']:
+            percentile = 100 - percentile
+        return np.where(np.isnan(values), np.nan, percentile)
+
+    def percentiles(self, player_stats):
+        """Rounded percentiles for one pitcher's main stat line, keyed by label."""
+        percentiles = {}
+        for stat, config in self.stats_config.items():
+            if self.size(stat) == 0:
+                continue
+            percentile = self.percentile_array(stat, [_row_stat_value(player_stats, stat)])[0]
+            if not np.isnan(percentile):
+                percentiles[config['label']] = round(percentile)
+        return percentiles
 
-        # Load conference data if provided
-        self.conference_df = None
-        if conference_csv and os.path.exists(conference_csv):
-            self.conference_df = pd.read_csv(conference_csv, low_memory=False)
-            # Filter to main stats only
-            pattern = r'^\d+$'
-            self.conference_df = self.conference_df[
-                self.conference_df['number'].astype(str).str.match(pattern, na=False)]
-            print(f"Loaded conference data with {len(self.conference_df)} pitchers")
+    def batch(self, pitchers_df):
+        """Percentiles for every row of a frame (a staff or the whole conference).
+
+        Returns a frame indexed like ``pitchers_df`` with one column per stat label.
+        """
+        result = pd.DataFrame(index=pitchers_df.index)
+        for stat, config in self.stats_config.items():
+            percentile = self.percentile_array(stat, _stat_values(pitchers_df, stat))
+            result[config['label']] = np.round(percentile)
+        return result
+
+
+# Resampled stat lines per pitcher behind each percentile band, and the
+# percentiles of those resamples the band spans (a 90% interval)
+BOOTSTRAP_RESAMPLES = 1000
+PERCENTILE_BAND = (5, 95)
+
+# Resampled values held at once (resamples x pitchers); bounds the memory
+# of a conference-wide run
+_BOOTSTRAP_BATCH = 1_000_000
+
+
+def _pitcher_rngs(df, seed):
+    """One random generator per pitcher, seeded by ``seed``, team_id and player name.
+
+    A pitcher's draws then depend only on their own identity, so adding or
+    removing a teammate leaves everyone else's bands (and cached pages) as
+    they were.
+    """
+    return [np.random.default_rng([seed, int(team_id),
+                                   int.from_bytes(hashlib.sha256(str(player).encode('utf-8')).digest()[:8], 'little')])
+            for team_id, player in zip(df['team_id'], df['player'])]
+
+
+def _resampled_stats(df, resamples, rngs):
+    """``{stat: (resamples, pitchers) array}`` of resampled percentile stats.
+
+    Each pitcher's plate appearances are drawn again from their own mix of
+    outcomes (strikeout, walk, HBP, sac fly, other non-AB, single ...
+    home run, other out) with that pitcher's generator from ``rngs``. WHIP and ERA
+    follow through the resampled batter outs (innings) and baserunners
+    (earned runs scale with them); GB% is a binomial draw over the
+    pitcher's batted balls.
+    """
+    def counts(column):
+        if column not in df.columns:
+            return np.zeros(len(df))
+        return np.nan_to_num(_float_values(df[column]))
+
+    bf, so, bb, hb, h, er = (counts(column) for column in ('bf', 'so', 'bb', 'hb', 'h', 'er'))
+    x2b, x3b, hr = counts('x2b_a'), counts('x3b_a'), counts('hr_a')
+    outcomes = np.maximum(np.column_stack([so, bb, hb, counts('sfa'), counts('ibb') + counts('sha'),
+                                           h - (x2b + x3b + hr), x2b, x3b, hr]), 0)
+    outcomes = np.column_stack([outcomes, np.maximum(bf - outcomes.sum(axis=1), 0)])
+    pa = outcomes.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pvals = np.where(pa[:, None] > 0, outcomes / pa[:, None], 1 / outcomes.shape[1])
+    go, fo = counts('go'), counts('fo')
+    batted = (go + fo).astype(np.int64)
+    go_share = np.divide(go, go + fo, out=np.zeros(len(df)), where=batted > 0)
+    draws = np.empty((resamples, len(df), outcomes.shape[1]), dtype=np.int64)
+    go_b = np.empty((resamples, len(df)), dtype=np.int64)
+    for i, rng in enumerate(rngs):
+        draws[:, i] = rng.multinomial(int(pa[i]), pvals[i], size=resamples)
+        go_b[:, i] = rng.binomial(batted[i], go_share[i], size=resamples)
+    so_b, bb_b, hb_b, sfa_b, other_b, x1b_b, x2b_b, x3b_b, hr_b, out_b = np.moveaxis(draws, -1, 0)
+
+    outs = counts('outs') if 'outs' in df.columns else innings_pitched(df) * 3
+
+    h_b = x1b_b + x2b_b + x3b_b + hr_b
+    ab_b = pa - (bb_b + hb_b + sfa_b + other_b)
+    runners = h + bb + hb
+    with np.errstate(divide='ignore', invalid='ignore'):
+        outs_b = outs * (so_b + out_b) / (so + outcomes[:, -1])
+        er_b = np.where(runners > 0, er * (h_b + bb_b + hb_b) / runners, er)
+        obp_b = (h_b + bb_b + hb_b) / (ab_b + bb_b + hb_b + sfa_b)
+        slg_b = (x1b_b + 2 * x2b_b + 3 * x3b_b + 4 * hr_b) / ab_b
+        return {
+            'era': np.where(outs_b > 0, er_b * 27 / outs_b, np.nan),
+            'whip': np.where(outs_b > 0, (h_b + bb_b) * 3 / outs_b, np.nan),
+            'k_perc': so_b / pa,
+            'bb_perc': bb_b / pa,
+            'BAA': h_b / ab_b,
+            'ops': obp_b + slg_b,
+            'groundout_perc': go_b / batted,
+        }
 
-        # Extract team name from filename
-        base_name = os.path.basename(csv_file)
-        team_name = base_name.split('_')[0].capitalize()
-        self.output_file = f"{team_name}_Pitching_Report.pdf"
-
-        self.styles = getSampleStyleSheet()
-        self._create_custom_styles()
-
-    def _create_custom_styles(self):
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=colors.HexColor('#1f4788'),
-            spaceAfter=30,
-            alignment=TA_CENTER
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='PlayerName',
-            parent=self.styles['Heading2'],
-            fontSize=18,
-            textColor=colors.HexColor('#c41e3a'),
-            spaceAfter=10
-        ))
-
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader',
-            parent=self.styles['Heading3'],
-            fontSize=14,
-            textColor=colors.HexColor('#1f4788'),
-            spaceAfter=8
-        ))
 
-    def _get_main_pitcher_data(self):
-        pattern = r'^\d+$'
-        main_stats = self.df[self.df['number'].astype(str).str.match(pattern, na=False)]
-        return main_stats
+def bootstrap_percentile_bands(percentile_index, pitchers_df, resamples=BOOTSTRAP_RESAMPLES,
+                               band=PERCENTILE_BAND, seed=0):
+    """Uncertainty band of every pitcher's percentiles, from resampling their stat lines.
+
+    Works on a staff or a whole conference at once: all pitchers'
+    resamples are drawn and ranked against the conference distribution
+    in batched array operations. Returns a frame indexed like
+    ``pitchers_df`` with ``(label, 'low')`` and ``(label, 'high')``
+    columns (rounded percentiles, NaN where undefined). A small sample
+    gets a wide band, a full season's workload a narrow one. Each pitcher
+    draws from a generator of their own (``seed``, team_id, name), so a
+    pitcher always gets the same band whoever else is on the staff.
+    """
+    rngs = _pitcher_rngs(pitchers_df, seed)
+    labels = [config['label'] for config in percentile_index.stats_config.values()]
+    result = np.full((len(pitchers_df), len(labels), 2), np.nan)
+    chunk = max(1, _BOOTSTRAP_BATCH // resamples)
+    for start in range(0, len(pitchers_df), chunk):
+        resampled = _resampled_stats(pitchers_df.iloc[start:start + chunk], resamples,
+                                     rngs[start:start + chunk])
+        for i, stat in enumerate(percentile_index.stats_config):
+            if percentile_index.size(stat) == 0:
+                continue
+            ranks = np.sort(percentile_index.percentile_array(stat, resampled[stat]), axis=0)
+            # NaN resamples (e.g. no at-bats drawn) sort last and are left out
+            defined = np.sum(~np.isnan(ranks), axis=0)
+            for j, q in enumerate(band):
+                position = np.clip(np.round(q / 100 * (defined - 1)), 0, None).astype(np.int64)
+                values = np.take_along_axis(ranks, position[None, :], axis=0)[0]
+                result[start:start + chunk, i, j] = np.where(defined > 0, np.round(values), np.nan)
+    columns = pd.MultiIndex.from_product([labels, ['low', 'high']])
+    return pd.DataFrame(result.reshape(len(pitchers_df), -1), index=pitchers_df.index, columns=columns)
+
+
+# Stats the conference ranking charts can rank teams on
+RANKING_STATS = {
+    'era': {'lower_better': True, 'format': '.2f'},
+    'whip': {'lower_better': True, 'format': '.2f'},
+    'BAA': {'lower_better': True, 'format': '.3f'},
+    'ops': {'lower_better': True, 'format': '.3f'},
+    'k_perc': {'lower_better': False, 'format': '.1%'},
+    'bb_perc': {'lower_better': True, 'format': '.1%'},
+    'k_bb_diff': {'lower_better': False, 'format': '.1%'},
+    'groundout_perc': {'lower_better': False, 'format': '.1%'},
+}
+
+_TOTAL_COLUMNS = ['er', 'so', 'bf', 'bb', 'hb', 'ibb', 'sha', 'sfa', 'h',
+                  'x2b_a', 'x3b_a', 'hr_a', 'fo', 'go']
+
+
+def _safe_divide(numerator, denominator, default=0.0):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, default)
+
+
+def sum_team_counts(main_df, by='team_id'):
+    """Counting stats (and true innings) of the main pitcher lines summed per team.
+
+    Sums from separate chunks or files combine with ``DataFrame.add`` before
+    ``team_rates`` derives the rates.
+    """
+    counts = pd.DataFrame({column: _float_values(main_df[column]) for column in _TOTAL_COLUMNS},
+                          index=main_df.index)
+    counts['ip_numeric'] = innings_pitched(main_df)
+    keys = main_df[by] if isinstance(by, str) else by
+    return counts.groupby(keys).sum()
+
+
+def team_rates(t):
+    """Team rate stats from the per-team sums of ``sum_team_counts``."""
+    # Plain arrays: per-Series arithmetic dominated the one-team totals of a page
+    index = t.index
+    t = dict(zip(t.columns, t.to_numpy(dtype=float).T))
+    AB = t['bf'] - (t['bb'] + t['hb'] + t['ibb'] + t['sha'] + t['sfa'])
+    batted = t['go'] + t['fo']
+    obp_denominator = AB + t['bb'] + t['hb'] + t['sfa']
+    x1b_a = t['h'] - (t['x2b_a'] + t['x3b_a'] + t['hr_a'])
+
+    totals = {}
+    totals['era'] = _safe_divide(t['er'] * 9, t['ip_numeric'])
+    totals['whip'] = _safe_divide(t['h'] + t['bb'], t['ip_numeric'])
+    totals['ip'] = t['ip_numeric']
+    totals['so'] = t['so']
+    totals['bb'] = t['bb']
+    totals['k_bb_ratio'] = _safe_divide(t['so'], t['bb'], default=t['so'])
+    totals['h'] = t['h']
+    totals['BAA'] = _safe_divide(t['h'], AB)
+    totals['obp'] = _safe_divide(t['h'] + t['bb'] + t['hb'], obp_denominator)
+    totals['slg'] = _safe_divide(x1b_a + 2 * t['x2b_a'] + 3 * t['x3b_a'] + 4 * t['hr_a'], AB)
+    totals['ops'] = totals['obp'] + totals['slg']
+    totals['k_perc'] = _safe_divide(t['so'], t['bf'])
+    totals['bb_perc'] = _safe_divide(t['bb'], t['bf'])
+    totals['k_bb_diff'] = totals['k_perc'] - totals['bb_perc']
+    totals['groundout_perc'] = _safe_divide(t['go'], batted)
+    totals['flyout_perc'] = _safe_divide(t['fo'], batted)
+    return pd.DataFrame(totals, index=index)
+
+
+def compute_team_totals(main_df, by='team_id'):
+    """Total the main pitcher lines per team and derive the team rates.
+
+    Single vectorized groupby over ``main_df``; returns one row per group
+    with the same stats ``_calculate_team_stats`` reports.
+    """
+    return team_rates(sum_team_counts(main_df, by))
+
+
+def team_ranking(conference_totals, team_stats, stat_name):
+    """Where a team's value for a RANKING_STATS entry sits among ``compute_team_totals`` rows."""
+    config = RANKING_STATS[stat_name]
+    lower_better = config['lower_better']
+    sorted_values = np.sort(conference_totals[stat_name].to_numpy(dtype=float))
+    team_value = team_stats[stat_name]
+
+    if lower_better:
+        rank = int((sorted_values < team_value).sum()) + 1
+    else:
+        rank = int((sorted_values > team_value).sum()) + 1
+
+    min_val, max_val = sorted_values[0], sorted_values[-1]
+    best_val, worst_val = (min_val, max_val) if lower_better else (max_val, min_val)
+    return {'value': team_value, 'rank': rank, 'teams': len(sorted_values),
+            'best': best_val, 'worst': worst_val, 'values': sorted_values,
+            'lower_better': lower_better, 'format': config['format']}
+
+
+@lru_cache(maxsize=None)
+def _logo_digest(path):
+    return file_digest(path)
+
+
+def _team_logo_path(team_id, team_name):
+    """Header logo of a team, found by its team_id's stem (else ``team_name``); None if missing."""
+    stem = team_names().get(int(team_id)) or ''.join(ch for ch in team_name.lower() if ch.isalnum())
+    path = os.path.join(TEAM_LOGO_DIR, f"{TEAM_LOGO_STEMS.get(stem, stem)}_logo.png")
+    if os.path.exists(path):
+        return path
+    if stem in TEAM_LOGO_STEMS or int(team_id) in team_names():
+        print(f"warning: no logo for {stem} (expected {path})", file=sys.stderr)
+    return None
+
+
+# Bump whenever page layout or styling changes so cached pitcher pages are re-rendered
+PAGE_LAYOUT_VERSION = 8
+
+# Pitcher pages rendered per doc.build when streaming a book without a page cache
+STREAM_CHUNK_SIZE = 25
+
+
+def _file_stem(path):
+    return os.path.basename(path).split('_')[0]
+
+
+@lru_cache(maxsize=None)
+def _team_file_names(directory):
+    """``{team_id: stem}`` of the team files in ``directory``, from their team_id column."""
+    names = {}
+    for path in sorted(glob.glob(os.path.join(directory, TEAM_FILE_PATTERN))):
+        try:
+            team_ids = pd.read_csv(path, usecols=['team_id'], nrows=1)['team_id']
+        except (OSError, ValueError):
+            continue
+        if len(team_ids):
+            names.setdefault(int(team_ids.iloc[0]), _file_stem(path))
+    return names
+
+
+def team_names():
+    """``{team_id: stem}`` of every team we can name: TEAM_NAMES, then team files on disk."""
+    names = {}
+    for directory in dict.fromkeys(os.path.abspath(directory) for directory in TEAM_FILE_DIRS):
+        for team_id, stem in _team_file_names(directory).items():
+            names.setdefault(team_id, stem)
+    names.update(TEAM_NAMES)
+    return names
+
+
+def team_name_for(team_id, source=None):
+    """File stem used for a team: known from its team_id, else taken from its file name."""
+    team_id = int(team_id)
+    if team_id in TEAM_NAMES:
+        return TEAM_NAMES[team_id]
+    if source is not None:
+        return _file_stem(source)
+    names = team_names()
+    if team_id in names:
+        return names[team_id]
+    print(f"warning: no name for team_id {team_id}; put its <name>_pitching.csv in the "
+          f"current directory or add it to TEAM_NAMES", file=sys.stderr)
+    return f"team{team_id}"
 
-    def _calculate_percentiles(self, player_stats):
-        if self.conference_df is None:
-            return None
 
-        percentiles = {}
+def _team_label(team_id):
+    team_id = int(team_id)
+    return team_names().get(team_id, str(team_id)).capitalize()
 
-        stats_config = {
-            'era': {'lower_better': True, 'label': 'ERA', 'min_ip': 10},
-            'whip': {'lower_better': True, 'label': 'WHIP', 'min_ip': 10},
-            'k_perc': {'lower_better': False, 'label': 'K%', 'min_ip': 10},
-            'bb_perc': {'lower_better': True, 'label': 'BB%', 'min_ip': 10},
-            'BAA': {'lower_better': True, 'label': 'BAA', 'min_ip': 10},
-            'ops': {'lower_better': True, 'label': 'OPS', 'min_ip': 10},
-            'groundout_perc': {'lower_better': False, 'label': 'GB%', 'min_ip': 5},
-        }
 
-        for stat, config in stats_config.items():
-            if stat == 'whip':
-                if 'whip' not in player_stats or pd.isna(player_stats.get('whip')):
-                    h = player_stats.get('h', 0)
-                    bb = player_stats.get('bb', 0)
-                    ip = player_stats.get('ip', 0)
-                    # Convert IP
-                    if ip > 0:
-                        ip_float = float(ip)
-                        whole = int(ip_float)
-                        decimal = ip_float - whole
-                        ip_numeric = whole + (decimal * 10 / 3)
-                        player_value = (h + bb) / ip_numeric if ip_numeric > 0 else None
-                    else:
-                        player_value = None
-                else:
-                    player_value = float(player_stats['whip'])
-            elif stat in player_stats and pd.notna(player_stats[stat]):
-                player_value = float(player_stats[stat])
-            else:
-                continue
+# Season-line columns exported by the JSON/HTML backends
+PREVIEW_LINE_COLUMNS = ['app', 'gs', 'ip', 'era', 'w', 'l', 'sv', 'so', 'bb', 'h', 'hr_a',
+                        'BAA', 'obp', 'slg', 'ops', 'k_perc', 'bb_perc', 'groundout_perc',
+                        'flyout_perc']
+PREVIEW_COUNT_COLUMNS = ['app', 'gs', 'w', 'l', 'sv', 'so', 'bb', 'h', 'hr_a']
 
-            if player_value is None:
-                continue
 
-            min_ip = config.get('min_ip', 10)
-            qualified_pitchers = self.conference_df[self.conference_df['ip'] >= min_ip].copy()
+class ScoutingReportGenerator:
+    # (RANKING_STATS key, chart title) for each chart on the summary page
+    ranking_charts = [
+        ('era', 'Team ERA vs Conference'),
+        ('k_bb_diff', 'K% - BB% vs Conference'),
+    ]
+
+    def __init__(self, csv_file, conference_csv=None, conference_df=None,
+                 team_name=None, output_dir=None, percentile_index=None, cache_dir=None,
+                 profiler=None, page_workers=None, warehouse=None, split_index=None,
+                 comparables_index=None, conference_totals=None):
+        # Opt-in stage timing; the null profiler makes every hook a no-op
+        self.profiler = profiler or NULL_PROFILER
+
+        # csv_file may also be an already-loaded team frame (batch runs)
+        if isinstance(csv_file, pd.DataFrame):
+            self.df = csv_file
+        else:
+            with self.profiler.stage('load_team_csv', path=csv_file):
+                self.df = load_pitching_data(csv_file, cache_dir)
+        self.csv_file = csv_file
 
-            # Calculate WHIP for conference if needed
-            if stat == 'whip':
-                def calc_whip(row):
-                    ip_float = float(row['ip'])
-                    whole = int(ip_float)
-                    decimal = ip_float - whole
-                    ip_numeric = whole + (decimal * 10 / 3)
-                    return (row['h'] + row['bb']) / ip_numeric if ip_numeric > 0 else None
+        # Classify rows once and index them by pitcher for the page builders
+        if 'row_type' not in self.df.columns:
+            self.df = self.df.assign(row_type=classify_rows(self.df))
+        if 'situation' not in self.df.columns:
+            self.df = self.df.assign(situation=classify_situations(self.df))
+        self.player_rows = index_player_rows(self.df)
+        self.splits = split_pivot(self.df)
+        self._staff_split_lines = None
+        self._percentile_bands = None
 
-                qualified_pitchers['whip'] = qualified_pitchers.apply(calc_whip, axis=1)
+        # Load conference data if provided
+        self.conference_df = None
+        if conference_df is not None:
+            self.conference_df = conference_df
+        elif conference_csv and os.path.exists(conference_csv):
+            # Filter to main stats only
+            with self.profiler.stage('load_conference_csv', path=conference_csv):
+                self.conference_df = load_conference_main(conference_csv, cache_dir)
+            print(f"Loaded conference data with {len(self.conference_df)} pitchers")
+            if split_index is None or comparables_index is None:
+                with self.profiler.stage('split_percentile_index'):
+                    conference_splits = split_pivot(load_conference_splits(conference_csv, cache_dir))
+                    split_index = split_index or SplitPercentileIndex(conference_splits)
+                with self.profiler.stage('comparables_index'):
+                    comparables_index = comparables_index or ComparablesIndex(self.conference_df,
+                                                                              conference_splits)
+
+        # Staff-wide split percentiles against the conference, sliced per page
+        self.split_percentiles = split_index.batch(self.splits) if split_index is not None else None
+
+        # Most similar pitchers elsewhere in the conference, for the whole staff at once
+        self.comparables = {}
+        if comparables_index is not None:
+            with self.profiler.stage('comparables'):
+                self.comparables = comparables_index.neighbors(
+                    self.df[np.asarray(self.df['row_type'] == ROW_MAIN)], self.splits)
+
+        self.percentile_index = percentile_index
+        # Team totals for the rankings; computed from conference_df unless given
+        # (e.g. from a streamed ConferenceSketch)
+        self._conference_team_totals = conference_totals
+        self.cache_dir = cache_dir
+        # Worker processes used to render pitcher pages (None/1 renders serially)
+        self.page_workers = page_workers
+        # Optional StatWarehouse with earlier seasons for the history table
+        self.warehouse = warehouse
+        if self.percentile_index is None and self.conference_df is not None:
+            with self.profiler.stage('percentile_index'):
+                self.percentile_index = PercentileIndex(self.conference_df)
+
+        # Team identity comes from team_id; the file name only names unknown teams
+        if team_name is None:
+            team_name = team_name_for(self.df['team_id'].iloc[0],
+                                      csv_file if isinstance(csv_file, str) else None)
+        self.team_name = team_name.capitalize()
+        self.logo_path = _team_logo_path(self.df['team_id'].iloc[0], team_name)
+        self.output_file = f"{self.team_name}_Pitching_Report.pdf"
+        if output_dir:
+            self.output_file = os.path.join(output_dir, self.output_file)
+
+        self._styles = None
+
+    @property
+    def styles(self):
+        """PDF paragraph styles, built on first use so stats-only runs never load ReportLab."""
+        if self._styles is None:
+            from cne_pdf_layout import report_styles
+            self._styles = report_styles()
+        return self._styles
 
-            conference_values = qualified_pitchers[stat].dropna()
+    def _get_main_pitcher_data(self):
+        return filter_main_rows(self.df)
 
-            if len(conference_values) > 0:
-                if config['lower_better']:
-                    percentile = (conference_values <= player_value).sum() / len(conference_values) * 100
-                    percentile = 100 - percentile
-                else:
-                    percentile = (conference_values <= player_value).sum() / len(conference_values) * 100
+    def _calculate_percentiles(self, player_stats):
+        if self.percentile_index is None:
+            return None
 
-                percentiles[config['label']] = round(percentile)
+        return self.percentile_index.percentiles(player_stats)
+
+    @property
+    def percentile_bands(self):
+        """``{(team_id, player): {label: (low, high)}}`` bootstrap bands for the staff, built once."""
+        if self._percentile_bands is None:
+            self._percentile_bands = {}
+            if self.percentile_index is not None:
+                main_pitchers = self._get_main_pitcher_data()
+                with self.profiler.stage('percentile_bands'):
+                    bands = bootstrap_percentile_bands(self.percentile_index, main_pitchers)
+                labels = list(dict.fromkeys(bands.columns.get_level_values(0)))
+                values = bands.to_numpy().reshape(len(bands), len(labels), 2)
+                for team_id, player, pitcher_bands in zip(main_pitchers['team_id'],
+                                                          main_pitchers['player'], values):
+                    self._percentile_bands[int(team_id), str(player)] = {
+                        label: (int(low), int(high))
+                        for label, (low, high) in zip(labels, pitcher_bands) if not np.isnan(low)}
+        return self._percentile_bands
+
+    def _pitcher_bands(self, main_row):
+        return self.percentile_bands.get((int(main_row['team_id']), str(main_row['player'])), {})
+
+    def calculate_staff_percentiles(self):
+        """Percentiles for every pitcher on the team, one row per pitcher."""
+        if self.percentile_index is None:
+            return None
 
+        main_pitchers = self._get_main_pitcher_data()
+        percentiles = self.percentile_index.batch(main_pitchers)
+        percentiles.insert(0, 'player', main_pitchers['player'])
         return percentiles
 
-    def _create_percentile_visualization(self, percentiles):
+    def season_history(self, main_row):
+        """``(year, stat line, percentiles)`` for each stored season up to the current one.
+
+        Earlier seasons come from the warehouse and are ranked against
+        that season's conference; the current line is ranked against the
+        loaded conference data. Empty without a warehouse or prior seasons.
+        """
+        if self.warehouse is None or pd.isna(main_row['year']):
+            return []
+        year = int(main_row['year'])
+        seasons = self.warehouse.player_seasons(main_row['player'], int(main_row['team_id']))
+        seasons = seasons[seasons['year'] < year]
+        if seasons.empty:
+            return []
+
+        history = []
+        for _, row in seasons.iterrows():
+            index = self.warehouse.percentile_index(row['year'])
+            history.append((int(row['year']), row, index.percentiles(row) if index else {}))
+        history.append((year, main_row, self._calculate_percentiles(main_row)))
+        return history
+
+    def _situational_lines(self, main_row, situational_data):
+        """``(label, stats, OPS percentile)`` per split row, in page order.
+
+        Known situations come from the staff pivot; unrecognized splits
+        keep their own name.
+        """
+        lines = list(self.staff_split_lines.get((int(main_row['team_id']), str(main_row['player'])), []))
+        unknown = situational_data['situation'].isna().to_numpy()
+        if unknown.any():
+            for _, row in situational_data[unknown].iterrows():
+                lines.append((str(row['number'])[:20], row, np.nan))
+        return lines
+
+    @property
+    def staff_split_lines(self):
+        """``{(team_id, player): [(label, stats, OPS percentile)]}`` for the staff, built once."""
+        if self._staff_split_lines is None:
+            n_situations, n_stats = len(SITUATION_LABELS), len(SPLIT_STATS)
+            values = self.splits.to_numpy(dtype=float).reshape(len(self.splits), n_situations, n_stats)
+            ops_pct = np.full(values.shape[:2], np.nan)
+            if self.split_percentiles is not None:
+                ops_pct = self.split_percentiles[[(code, 'ops') for code in SITUATION_LABELS]].to_numpy()
+            has_row = ~np.isnan(values[:, :, SPLIT_STATS.index('AB')])
+            labels = list(SITUATION_LABELS.values())
+
+            self._staff_split_lines = {}
+            for i, (team_id, player) in enumerate(self.splits.index):
+                self._staff_split_lines[int(team_id), str(player)] = [
+                    (labels[j], dict(zip(SPLIT_STATS, values[i, j].tolist())), ops_pct[i, j])
+                    for j in np.flatnonzero(has_row[i])
+                ]
+        return self._staff_split_lines
+
+    def _create_history_table(self, history):
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Table
+        from cne_pdf_layout import SITUATIONAL_STYLE
+        rows = [['Season', 'IP', 'ERA', 'WHIP', 'K%', 'BB%', 'OPS', 'ERA %ile', 'K% %ile']]
+        for season in history:
+            percentiles = season['percentiles'] or {}
+            rows.append([
+                str(season['year']),
+                format_stat(season['ip'], '', missing='0'),
+                format_stat(season['era']),
+                format_stat(season['whip']),
+                format_stat(season['k_perc'], percent=True),
+                format_stat(season['bb_perc'], percent=True),
+                format_stat(season['ops'], '.3f'),
+                str(percentiles.get('ERA', '-')),
+                str(percentiles.get('K%', '-')),
+            ])
+
+        t_history = Table(rows, colWidths=[0.5 * inch] + [0.45 * inch] * 6 + [0.6 * inch] * 2)
+        t_history.setStyle(SITUATIONAL_STYLE)
+        return t_history
+
+    def _create_comparables_table(self, comparables):
+        from reportlab.lib.units import inch
+        from reportlab.platypus import Table
+        from cne_pdf_layout import SITUATIONAL_STYLE
+        rows = [['Comparable Pitchers', 'Team', 'IP', 'ERA', 'K%', 'BB%', 'OPS']]
+        for comparable in comparables:
+            rows.append([
+                comparable['player'],
+                comparable['team'],
+                format_stat(comparable['ip'], '', missing='0'),
+                format_stat(comparable['era']),
+                format_stat(comparable['k_perc'], percent=True),
+                format_stat(comparable['bb_perc'], percent=True),
+                format_stat(comparable['ops'], '.3f'),
+            ])
+
+        t_comparables = Table(rows, colWidths=[1.8 * inch, 1.3 * inch] + [0.7 * inch] * 5)
+        t_comparables.setStyle(SITUATIONAL_STYLE)
+        return t_comparables
+
+    def _create_percentile_visualization(self, percentiles, bands=None):
+        from reportlab.graphics.shapes import Circle, Line, String
+        from reportlab.lib import colors
+        from cne_pdf_layout import (
+            PERCENTILE_BAND_WIDTH, PERCENTILE_BAR_LENGTH, PERCENTILE_BAR_START_X,
+            PercentileBarsDrawing, percentile_band_color, percentile_color,
+        )
         if not percentiles:
             return None
 
-        bar_length = 580
-        bar_start_x = 80
-        bar_end_x = bar_start_x + bar_length
-
-        drawing = Drawing(bar_end_x + 50, 35 * len(percentiles))
-        y_position = drawing.height - 30
-
-        for stat_label, percentile in percentiles.items():
-            # Background line
-            line = Line(bar_start_x, y_position, bar_end_x, y_position)
-            line.strokeColor = colors.HexColor('#9b9b9b')
-            line.strokeWidth = 2
-            drawing.add(line)
-
-            # Markers at 0, 50, 100
-            for marker_pct in [0, 50, 100]:
-                x_pos = bar_start_x + (marker_pct / 100) * bar_length
-                circle = Circle(x_pos, y_position, 4)
-                circle.fillColor = colors.HexColor('#9b9b9b')
-                circle.strokeColor = colors.HexColor('#9b9b9b')
-                drawing.add(circle)
+        drawing = PercentileBarsDrawing(tuple(percentiles))
+        y_position = 35 * len(percentiles) - 30
 
+        for label, percentile in percentiles.items():
             if pd.notna(percentile):
-                x_pos = bar_start_x + (percentile / 100) * bar_length
-
-                # Color gradient
-                if percentile <= 50:
-                    ratio = percentile / 50
-                    r = int(41 + (255 - 41) * ratio)
-                    g = int(82 + (255 - 82) * ratio)
-                    b = int(163 + (255 - 163) * ratio)
-                else:
-                    ratio = (percentile - 50) / 50
-                    r = int(255 - (255 - 204) * ratio)
-                    g = int(255 - 255 * ratio)
-                    b = int(255 - 255 * ratio)
-
-                fill_color = colors.Color(r / 255, g / 255, b / 255)
+                x_pos = PERCENTILE_BAR_START_X + (percentile / 100) * PERCENTILE_BAR_LENGTH
+
+                # Bootstrap interval behind the marker: wide for small samples
+                band = (bands or {}).get(label)
+                if band is not None and band[1] > band[0]:
+                    line = Line(PERCENTILE_BAR_START_X + band[0] / 100 * PERCENTILE_BAR_LENGTH, y_position,
+                                PERCENTILE_BAR_START_X + band[1] / 100 * PERCENTILE_BAR_LENGTH, y_position)
+                    line.strokeColor = percentile_band_color(percentile)
+                    line.strokeWidth = PERCENTILE_BAND_WIDTH
+                    line.strokeLineCap = 1
+                    drawing.add(line)
 
                 circle = Circle(x_pos, y_position, 12)
-                circle.fillColor = fill_color
+                circle.fillColor = percentile_color(percentile)
                 circle.strokeColor = colors.black
                 circle.strokeWidth = 1
                 drawing.add(circle)
@@ -193,129 +1114,49 @@ class ScoutingReportGenerator:
                 text.textAnchor = 'middle'
                 drawing.add(text)
 
-            label = String(10, y_position - 4, stat_label)
-            label.fontSize = 11
-            label.fontName = 'Helvetica-Oblique'
-            label.fillColor = colors.black
-            drawing.add(label)
-
             y_position -= 35
         drawing.translate(0, 15)
         return drawing
 
     def _calculate_team_stats(self):
-        # Get main pitcher data only (exclude splits)
+        # Get main pitcher data only (exclude splits) and total it as one group
         main_pitchers = self._get_main_pitcher_data()
-
-        # Convert IP from decimal format to fractional innings
-        def convert_ip(ip_value):
-            if pd.isna(ip_value):
-                return 0
-            ip_float = float(ip_value)
-            whole = int(ip_float)
-            decimal = ip_float - whole
-            # Convert .1 = 1/3 inning, .2 = 2/3 inning
-            fractional = decimal * 10 / 3
-            return whole + fractional
-
-        main_pitchers['ip_numeric'] = main_pitchers['ip'].apply(convert_ip)
-
-        # Calculate totals
-        total_er = main_pitchers['er'].sum()
-        total_innings = main_pitchers['ip_numeric'].sum()
-        k = main_pitchers['so'].sum()
-        bf_total = main_pitchers['bf'].sum()
-        bb_total = main_pitchers['bb'].sum()
-        hb_total = main_pitchers['hb'].sum()
-        ibb_total = main_pitchers['ibb'].sum()
-        sha_total = main_pitchers['sha'].sum()
-        sfa_total = main_pitchers['sfa'].sum()
-        h_total = main_pitchers['h'].sum()
-        x2b_total = main_pitchers['x2b_a'].sum()
-        x3b_total = main_pitchers['x3b_a'].sum()
-        hr_total = main_pitchers['hr_a'].sum()
-        fo_total = main_pitchers['fo'].sum()
-        go_total = main_pitchers['go'].sum()
-
-        # Derived statistics
-        AB = bf_total - (bb_total + hb_total + ibb_total + sha_total + sfa_total)
-        BAA = h_total / AB if AB > 0 else 0
-        flyout_perc = fo_total / (go_total + fo_total) if (go_total + fo_total) > 0 else 0
-        groundout_perc = go_total / (go_total + fo_total) if (go_total + fo_total) > 0 else 0
-        k_perc = k / bf_total if bf_total > 0 else 0
-        bb_perc = bb_total / bf_total if bf_total > 0 else 0
-        obp = (h_total + bb_total + hb_total) / (AB + bb_total + hb_total + sfa_total) if (
-                                                                                                      AB + bb_total + hb_total + sfa_total) > 0 else 0
-        x1b_a = h_total - (x2b_total + x3b_total + hr_total)
-        slg = (x1b_a + 2 * x2b_total + 3 * x3b_total + 4 * hr_total) / AB if AB > 0 else 0
-        ops = obp + slg
-        k_bb_ratio = k / bb_total if bb_total > 0 else k
-        era = (total_er * 9) / total_innings if total_innings > 0 else 0
-        whip = (h_total + bb_total) / total_innings if total_innings > 0 else 0
-
-        return {
-            'era': era,
-            'whip': whip,
-            'ip': total_innings,
-            'so': k,
-            'bb': bb_total,
-            'k_bb_ratio': k_bb_ratio,
-            'h': h_total,
-            'BAA': BAA,
-            'ops': ops,
-            'k_perc': k_perc,
-            'bb_perc': bb_perc,
-        }
-
-    def _create_team_comparison_chart(self, team_stats, stat_name, label):
-        if self.conference_df is None:
-            return None
-
-        # Calculate conference team stats
-        conference_teams = self.conference_df['team_id'].unique()
-        conference_team_stats = []
-
-        for team in conference_teams:
-            team_pitchers = self.conference_df[self.conference_df['team_id'] == team]
-
-            # Same calculation logic
-            def convert_ip(ip_value):
-                if pd.isna(ip_value):
-                    return 0
-                ip_float = float(ip_value)
-                whole = int(ip_float)
-                decimal = ip_float - whole
-                fractional = decimal * 10 / 3
-                return whole + fractional
-
-            team_pitchers['ip_numeric'] = team_pitchers['ip'].apply(convert_ip)
-
-            if stat_name == 'era':
-                total_er = team_pitchers['er'].sum()
-                total_innings = team_pitchers['ip_numeric'].sum()
-                value = (total_er * 9) / total_innings if total_innings > 0 else 0
-            elif stat_name == 'k_bb_diff':
-                k = team_pitchers['so'].sum()
-                bf_total = team_pitchers['bf'].sum()
-                bb_total = team_pitchers['bb'].sum()
-                k_perc = k / bf_total if bf_total > 0 else 0
-                bb_perc = bb_total / bf_total if bf_total > 0 else 0
-                value = k_perc - bb_perc
-
-            conference_team_stats.append(value)
+        totals = compute_team_totals(main_pitchers, by=np.zeros(len(main_pitchers), dtype=int))
+        return totals.reindex([0], fill_value=0).iloc[0].to_dict()
+
+    @property
+    def conference_team_totals(self):
+        """Team totals and rates for every conference team, computed once."""
+        if self._conference_team_totals is None and self.conference_df is not None:
+            self._conference_team_totals = compute_team_totals(self.conference_df)
+        return self._conference_team_totals
+
+    def team_ranking(self, team_stats, stat_name):
+        """Where the team's value for a RANKING_STATS entry sits among the conference teams."""
+        return team_ranking(self.conference_team_totals, team_stats, stat_name)
+
+    def _create_team_comparison_chart(self, ranking):
+        """Number-line chart of one ``team_data`` ranking among the conference teams."""
+        from reportlab.graphics.shapes import Circle, Drawing, Line, String
+        from reportlab.lib import colors
+        label = ranking['label']
+        lower_better = ranking['lower_better']
+        value_format = ranking['format']
+        sorted_values = ranking['values']
+        num_teams = ranking['teams']
+        team_value = ranking['value']
+        rank = ranking['rank']
+        min_val, max_val = sorted_values[0], sorted_values[-1]
 
         # Create drawing
         drawing = Drawing(450, 100)
 
-        # Sort values for ranking
-        sorted_values = sorted(conference_team_stats)
-        team_value = team_stats['era'] if stat_name == 'era' else (team_stats['k_perc'] - team_stats['bb_perc'])
-
-        # Find team's rank
-        if stat_name == 'era':
-            rank = sum(1 for v in sorted_values if v < team_value) + 1
-        else:
-            rank = sum(1 for v in sorted_values if v > team_value) + 1
+        def x_position(val):
+            if max_val > min_val:
+                if lower_better:
+                    return 50 + ((max_val - val) / (max_val - min_val)) * 350
+                return 50 + ((val - min_val) / (max_val - min_val)) * 350
+            return 225
 
         # Draw background line
         line = Line(50, 50, 400, 50)
@@ -325,37 +1166,18 @@ class ScoutingReportGenerator:
 
         # Draw all conference teams as small dots
         for val in sorted_values:
-            if stat_name == 'era':
-                min_val, max_val = min(sorted_values), max(sorted_values)
-            else:
-                min_val, max_val = min(sorted_values), max(sorted_values)
-
-            if max_val > min_val:
-                if stat_name == 'era':
-                    x_pos = 50 + ((max_val - val) / (max_val - min_val)) * 350
-                else:
-                    x_pos = 50 + ((val - min_val) / (max_val - min_val)) * 350
-            else:
-                x_pos = 225
-
-            circle = Circle(x_pos, 50, 3)
+            circle = Circle(x_position(val), 50, 3)
             circle.fillColor = colors.HexColor('#cccccc')
             circle.strokeColor = colors.HexColor('#999999')
             drawing.add(circle)
 
         # Highlight team's position
-        if max_val > min_val:
-            if stat_name == 'era':
-                team_x = 50 + ((max_val - team_value) / (max_val - min_val)) * 350
-            else:
-                team_x = 50 + ((team_value - min_val) / (max_val - min_val)) * 350
-        else:
-            team_x = 225
+        team_x = x_position(team_value)
 
         # Color based on rank
-        if rank <= len(conference_teams) * 0.25:
+        if rank <= num_teams * 0.25:
             team_color = colors.HexColor('#00AA00')  # Green - top 25%
-        elif rank <= len(conference_teams) * 0.5:
+        elif rank <= num_teams * 0.5:
             team_color = colors.HexColor('#FFA500')  # Orange - top 50%
         else:
             team_color = colors.HexColor('#FF0000')  # Red - bottom 50%
@@ -374,8 +1196,8 @@ class ScoutingReportGenerator:
         drawing.add(title)
 
         # Add value and rank
-        value_text = f"{team_value:.2f}" if stat_name == 'era' else f"{team_value:.1%}"
-        rank_text = f"Rank: {rank}/{len(conference_teams)}"
+        value_text = f"{team_value:{value_format}}"
+        rank_text = f"Rank: {rank}/{num_teams}"
 
         val_label = String(team_x, 30, value_text)
         val_label.fontSize = 10
@@ -388,230 +1210,155 @@ class ScoutingReportGenerator:
         rank_label.textAnchor = 'middle'
         drawing.add(rank_label)
 
-        # Add min/max labels
-        if stat_name == 'era':
-            min_label = String(400, 60, f"Best: {min_val:.2f}")
-            max_label = String(50, 60, f"Worst: {max_val:.2f}")
-        else:
-            max_label = String(400, 60, f"Best: {max_val:.1%}")
-            min_label = String(50, 60, f"Worst: {min_val:.1%}")
+        # Add best/worst labels at the ends of the line
+        best_label = String(400, 60, f"Best: {ranking['best']:{value_format}}")
+        worst_label = String(50, 60, f"Worst: {ranking['worst']:{value_format}}")
 
-        min_label.fontSize = 8
-        max_label.fontSize = 8
-        min_label.textAnchor = 'end'
-        max_label.textAnchor = 'start'
-        drawing.add(min_label)
-        drawing.add(max_label)
+        best_label.fontSize = 8
+        worst_label.fontSize = 8
+        best_label.textAnchor = 'end'
+        worst_label.textAnchor = 'start'
+        drawing.add(best_label)
+        drawing.add(worst_label)
 
         return drawing
 
     def _create_summary_page(self, story):
-        base_name = os.path.basename(self.csv_file)
-        team_name = base_name.split('_')[0].capitalize()
+        from reportlab.lib.units import inch
+        from reportlab.platypus import PageBreak, Paragraph, Spacer, Table
+        from cne_pdf_layout import SUMMARY_TABLE_STYLE
+        team_name = self.team_name
+
+        # Same values the JSON/HTML previews are written from
+        with self.profiler.stage('team_data'):
+            team = self.team_data()
+        summary = team['summary']
 
         title = Paragraph("PITCHING STAFF SCOUTING REPORT", self.styles['CustomTitle'])
         story.append(title)
 
-        year = self.df['year'].iloc[0] if 'year' in self.df.columns else datetime.now().year
-        subtitle = Paragraph(f"{team_name} | Season: {year}", self.styles['Normal'])
+        subtitle = Paragraph(f"{team_name} | Season: {team['year']}", self.styles['Normal'])
         story.append(subtitle)
         story.append(Spacer(1, 0.3 * inch))
 
-        # Calculate team stats properly
-        team_stats = self._calculate_team_stats()
-
-        def safe_format(value, format_str='.2f', is_percent=False, multiplier=1):
-            if pd.isna(value) or value == float('inf') or value == float('-inf'):
-                return "N/A"
-            try:
-                result = float(value) * multiplier
-                if is_percent:
-                    return f"{result:.1f}%"
-                else:
-                    return f"{result:{format_str}}"
-            except (ValueError, TypeError):
-                return "N/A"
-
         summary_data = [
             ['TEAM PITCHING SUMMARY', ''],
-            ['Team ERA', safe_format(team_stats['era'], '.2f')],
-            ['Team WHIP', safe_format(team_stats['whip'], '.2f')],
-            ['Total Innings', safe_format(team_stats['ip'], '.1f')],
-            ['Total Strikeouts', str(int(team_stats['so']))],
-            ['Total Walks', str(int(team_stats['bb']))],
-            ['K/BB Ratio', safe_format(team_stats['k_bb_ratio'], '.2f')],
-            ['Hits Allowed', str(int(team_stats['h']))],
-            ['BAA', safe_format(team_stats['BAA'], '.3f')],
-            ['OPS Against', safe_format(team_stats['ops'], '.3f')],
-            ['K%', safe_format(team_stats['k_perc'], is_percent=True, multiplier=100)],
-            ['BB%', safe_format(team_stats['bb_perc'], is_percent=True, multiplier=100)],
+            ['Team ERA', format_stat(summary['era'])],
+            ['Team WHIP', format_stat(summary['whip'])],
+            ['Total Innings', format_stat(summary['ip'], '.1f')],
+            ['Total Strikeouts', format_stat(summary['so'], 'd')],
+            ['Total Walks', format_stat(summary['bb'], 'd')],
+            ['K/BB Ratio', format_stat(summary['k_bb_ratio'])],
+            ['Hits Allowed', format_stat(summary['h'], 'd')],
+            ['BAA', format_stat(summary['BAA'], '.3f')],
+            ['OPS Against', format_stat(summary['ops'], '.3f')],
+            ['K%', format_stat(summary['k_perc'], percent=True)],
+            ['BB%', format_stat(summary['bb_perc'], percent=True)],
         ]
 
         t = Table(summary_data, colWidths=[3 * inch, 2 * inch])
-        t.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 14),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
-        ]))
+        t.setStyle(SUMMARY_TABLE_STYLE)
 
         story.append(t)
         story.append(Spacer(1, 0.4 * inch))
 
-        if self.conference_df is not None:
+        if team['rankings']:
             story.append(Paragraph("CONFERENCE RANKINGS", self.styles['SectionHeader']))
             story.append(Spacer(1, 0.2 * inch))
 
-            # ERA chart
-            era_chart = self._create_team_comparison_chart(team_stats, 'era', 'Team ERA vs Conference')
-            if era_chart:
-                story.append(era_chart)
-                story.append(Spacer(1, 0.3 * inch))
-
-            # K% - BB% chart
-            kbb_chart = self._create_team_comparison_chart(team_stats, 'k_bb_diff', 'K% - BB% vs Conference')
-            if kbb_chart:
-                story.append(kbb_chart)
+            for stat_name, ranking in team['rankings'].items():
+                with self.profiler.stage('team_ranking_chart', stat=stat_name):
+                    chart = self._create_team_comparison_chart(ranking)
+                story.append(chart)
                 story.append(Spacer(1, 0.3 * inch))
 
         story.append(PageBreak())
 
 
 
-    def _create_player_page(self, player_data, story):
-
-        import pandas as pd
-        from reportlab.platypus import (
-            Paragraph, Spacer, Table, TableStyle, PageBreak, KeepInFrame
-        )
-        from reportlab.lib import colors
+    def _create_player_page(self, player_rows, story):
         from reportlab.lib.units import inch
-
-
-        pattern = r'^\d+$'
-        main_row = player_data[player_data['number'].astype(str).str.match(pattern, na=False)]
-
-        if main_row.empty:
+        from reportlab.platypus import PageBreak, Paragraph, Spacer, Table, TableStyle
+        from cne_pdf_layout import NOTES_STYLE, PAGE_LAYOUT_STYLE, PRIMARY_STATS_STYLE, SITUATIONAL_STYLE
+        if player_rows.main.empty:
             return
 
-        main_row = main_row.iloc[0]
-
-        player_name = main_row['player']
-        yr = main_row['yr'] if pd.notna(main_row['yr']) else 'N/A'
-        pos = main_row['pos'] if pd.notna(main_row['pos']) else 'P'
-        b_t = main_row['b_t'] if pd.notna(main_row['b_t']) else 'N/A'
+        # Same values the JSON/HTML previews are written from
+        with self.profiler.stage('pitcher_data'):
+            pitcher = self.pitcher_data(player_rows)
+        line = pitcher['line']
 
-        story.append(Paragraph(f"{player_name} - #{main_row['number']}", self.styles['PlayerName']))
-        story.append(Paragraph(f"{yr} | {pos} | {b_t}", self.styles['Normal']))
+        story.append(Paragraph(f"{pitcher['player']} - #{pitcher['number']}", self.styles['PlayerName']))
+        story.append(Paragraph(f"{pitcher['yr']} | {pitcher['pos']} | {pitcher['b_t']}", self.styles['Normal']))
         story.append(Spacer(1, 0.15 * inch))
 
+        def count(column):
+            return format_stat(line.get(column), 'd', missing='0')
 
         primary_stats = [
             ['Stat', 'Value'],
-            ['Appearances', str(int(main_row['app'])) if pd.notna(main_row['app']) else '0'],
-            ['Games Started', str(int(main_row['gs'])) if pd.notna(main_row['gs']) else '0'],
-            ['ERA', f"{main_row['era']:.2f}" if pd.notna(main_row['era']) else 'N/A'],
-            ['Innings Pitched', str(main_row['ip']) if pd.notna(main_row['ip']) else '0'],
-            ['Wins', str(int(main_row['w'])) if pd.notna(main_row['w']) else '0'],
-            ['Losses', str(int(main_row['l'])) if pd.notna(main_row['l']) else '0'],
-            ['Saves', str(int(main_row['sv'])) if pd.notna(main_row['sv']) else '0'],
-            ['Strikeouts', str(int(main_row['so'])) if pd.notna(main_row['so']) else '0'],
-            ['Walks', str(int(main_row['bb'])) if pd.notna(main_row['bb']) else '0'],
-            ['K/BB Ratio',
-             f"{main_row['so'] / max(main_row['bb'], 1):.2f}"
-             if pd.notna(main_row['so']) and pd.notna(main_row['bb']) else 'N/A'],
-            ['Hits Allowed', str(int(main_row['h'])) if pd.notna(main_row['h']) else '0'],
-            ['Home Runs', str(int(main_row['hr_a'])) if pd.notna(main_row['hr_a']) else '0'],
-            ['BAA', f"{main_row['BAA']:.3f}" if pd.notna(main_row['BAA']) else 'N/A'],
-            ['OPS Against', f"{main_row['ops']:.3f}" if pd.notna(main_row['ops']) else 'N/A'],
-            ['Ground Ball %',
-             f"{main_row['groundout_perc'] * 100:.1f}%" if pd.notna(main_row['groundout_perc']) else 'N/A'],
-            ['Fly Out %',
-             f"{main_row['flyout_perc'] * 100:.1f}%" if pd.notna(main_row['flyout_perc']) else 'N/A'],
-            ['K%', f"{main_row['k_perc'] * 100:.1f}%" if pd.notna(main_row['k_perc']) else 'N/A'],
-            ['BB%', f"{main_row['bb_perc'] * 100:.1f}%" if pd.notna(main_row['bb_perc']) else 'N/A'],
+            ['Appearances', count('app')],
+            ['Games Started', count('gs')],
+            ['ERA', format_stat(line['era'])],
+            ['Innings Pitched', format_stat(line['ip'], '', missing='0')],
+            ['Wins', count('w')],
+            ['Losses', count('l')],
+            ['Saves', count('sv')],
+            ['Strikeouts', count('so')],
+            ['Walks', count('bb')],
+            ['K/BB Ratio', format_stat(line['k_bb_ratio'])],
+            ['Hits Allowed', count('h')],
+            ['Home Runs', count('hr_a')],
+            ['BAA', format_stat(line['BAA'], '.3f')],
+            ['OPS Against', format_stat(line['ops'], '.3f')],
+            ['Ground Ball %', format_stat(line['groundout_perc'], percent=True)],
+            ['Fly Out %', format_stat(line['flyout_perc'], percent=True)],
+            ['K%', format_stat(line['k_perc'], percent=True)],
+            ['BB%', format_stat(line['bb_perc'], percent=True)],
         ]
 
-        t_primary = Table(primary_stats, colWidths=[2.2 * inch, 1.0 * inch])
-        t_primary.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#c41e3a')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.white),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
+        t_primary = Table(primary_stats, colWidths=[1.25 * inch, 0.6 * inch])
+        t_primary.setStyle(PRIMARY_STATS_STYLE)
 
 
-        pattern2 = r'^\d+$'
-        situational_data = player_data[~player_data['number'].astype(str).str.match(pattern2, na=False)]
-
         t_situational = Paragraph("No situational data", self.styles['Normal'])
 
-        if not situational_data.empty:
-            situational_stats = [['Situation', 'IP', 'H', 'BB', 'SO', 'BAA', 'OPS']]
-
-            for _, row in situational_data.iterrows():
-                name = row['number']
-                ln = name.lower()
-
-                # display names
-                mapping = {
-                    'vs lhb': 'vs LHB', 'vs lh': 'vs LHB',
-                    'vs rhb': 'vs RHB', 'vs rh': 'vs RHB',
-                    'with runners ob': 'Runners On',
-                    'scorepos2': 'RISP 2-Out',
-                    'scorepos': 'RISP',
-                    'runners2': 'Runners on 2nd',
-                    'bases loaded': 'Bases Loaded',
-                    'bases empty': 'Bases Empty',
-                    'w2outs': '2 Outs',
-                    'leadoff': 'vs Leadoff'
-                }
-
-                display = next((v for k, v in mapping.items() if k in ln), name[:20])
+        if not player_rows.splits.empty:
+            situational_stats = [['Situation', 'IP', 'H', 'BB', 'SO', 'BAA', 'OPS', 'OPS %ile']]
 
+            for split in pitcher['splits']:
                 situational_stats.append([
-                    display,
-                    str(row['ip']) if pd.notna(row['ip']) else '-',
-                    str(int(row['h'])) if pd.notna(row['h']) else '-',
-                    str(int(row['bb'])) if pd.notna(row['bb']) else '-',
-                    str(int(row['so'])) if pd.notna(row['so']) else '-',
-                    f"{row['BAA']:.3f}" if pd.notna(row['BAA']) else '-',
-                    f"{row['ops']:.3f}" if pd.notna(row['ops']) else '-',
+                    split['label'],
+                    format_stat(split['ip'], '', missing='-'),
+                    format_stat(split['h'], 'd', missing='-'),
+                    format_stat(split['bb'], 'd', missing='-'),
+                    format_stat(split['so'], 'd', missing='-'),
+                    format_stat(split['BAA'], '.3f', missing='-'),
+                    format_stat(split['ops'], '.3f', missing='-'),
+                    format_stat(split['ops_percentile'], 'd', missing='-'),
                 ])
 
             t_situational = Table(
                 situational_stats,
-                colWidths=[1.8 * inch, 0.6 * inch, 0.5 * inch, 0.5 * inch,
-                           0.5 * inch, 0.6 * inch, 0.6 * inch],
-                rowHeights=[0.30 * inch] + [0.35 * inch] * (len(situational_stats) - 1)
+                colWidths=[1.0 * inch, 0.45 * inch, 0.4 * inch, 0.4 * inch,
+                           0.4 * inch, 0.5 * inch, 0.5 * inch, 0.6 * inch],
             )
-            t_situational.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-                ('ALIGN', (0, 1), (0, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 7),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ]))
+            t_situational.setStyle(SITUATIONAL_STYLE)
 
 
         percentile_viz = None
-        if self.conference_df is not None:
-            percentiles = self._calculate_percentiles(main_row)
-            if percentiles:
-                percentile_viz = self._create_percentile_visualization(percentiles)
+        if pitcher['percentiles']:
+            percentile_viz = self._create_percentile_visualization(pitcher['percentiles'],
+                                                                   pitcher['percentile_bands'])
 
         if percentile_viz is None:
             percentile_viz = Paragraph("No percentile data", self.styles['Normal'])
 
 
+        t_comparables = None
+        if pitcher['comparables']:
+            t_comparables = self._create_comparables_table(pitcher['comparables'])
+
         notes_data = [
             ['Area', 'Notes'],
             ['Strengths', ''],
@@ -622,72 +1369,736 @@ class ScoutingReportGenerator:
 
         t_notes = Table(
             notes_data,
-            colWidths=[1.3 * inch, 8 * inch],
-            rowHeights=[0.3 * inch] + [0.75 * inch] * 4,
+            colWidths=[1.1 * inch, 5.6 * inch],
+            rowHeights=[0.25 * inch] + [0.5 * inch] * 4,
             hAlign = 'CENTER'
         )
 
-        t_notes.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#c41e3a')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('VALIGN', (0, 1), (-1, -1), 'TOP'),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ]))
+        t_notes.setStyle(NOTES_STYLE)
+
+        # The season-by-season line sits under the splits, beside the primary stats
+        right_column = [t_situational]
+        if pitcher['history']:
+            right_column += [Spacer(1, 6), self._create_history_table(pitcher['history'])]
 
         layout_grid = [
-            [t_primary, t_situational],  # top row = 2 columns
-            [percentile_viz],  # middle = 1 column full width
-            [t_notes]  # bottom = 1 column full width
+            [t_primary, right_column],  # top row = 2 columns
+            [percentile_viz],  # middle = full width
+            [t_notes]  # bottom = full width
         ]
+        if t_comparables is not None:
+            # Comparable pitchers between the percentiles and the notes
+            layout_grid.insert(2, [t_comparables])
 
-        layout_table = Table(layout_grid, colWidths=[3.45 * inch, 3.45 * inch])
-        layout_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('LEFTPADDING', (0, 0), (-1, -1), 4),
-            ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-        ]))
-
-        # Fit everything on one page
-        final_frame = KeepInFrame(
-            7.0 * inch,
-            9.1 * inch,
-            [layout_table],
-            mode='shrink'
-        )
+        # Sized so the page fits at its natural size below the player header
+        layout_table = Table(layout_grid, colWidths=[2.05 * inch, 4.85 * inch])
+        layout_table.setStyle(PAGE_LAYOUT_STYLE)
+        layout_table.setStyle(TableStyle([('SPAN', (0, row), (1, row))
+                                          for row in range(1, len(layout_grid))]))
 
-        story.append(final_frame)
+        story.append(layout_table)
         story.append(PageBreak())
 
-    def generate_report(self):
-        doc = SimpleDocTemplate(self.output_file, pagesize=letter,
-                                rightMargin=0.5 * inch, leftMargin=0.5 * inch,
-                                topMargin=0.5 * inch, bottomMargin=0.5 * inch)
+    def _new_doc(self, output, **kwargs):
+        from cne_pdf_layout import new_doc
+        return new_doc(output, **kwargs)
 
-        story = []
+    def _draw_header(self, canvas, doc):
+        """Team logo in the top right corner; the image XObject is written once per document."""
+        from cne_pdf_layout import LOGO_SIZE, LOGO_TOP_MARGIN, team_logo
+        logo = team_logo(self.logo_path) if self.logo_path else None
+        if logo is None:
+            return
+        canvas.drawImage(logo, doc.pagesize[0] - doc.rightMargin - LOGO_SIZE,
+                         doc.pagesize[1] - LOGO_TOP_MARGIN - LOGO_SIZE, LOGO_SIZE, LOGO_SIZE,
+                         mask='auto', preserveAspectRatio=True, anchor='ne')
+
+    def _build(self, doc, story, header=True):
+        """doc.build with the layout and serialization stages profiled when enabled."""
+        from cne_pdf_layout import profiled_canvas
+        kwargs = {}
+        if header:
+            kwargs.update(onFirstPage=self._draw_header, onLaterPages=self._draw_header)
+        if not self.profiler.enabled:
+            doc.build(story, **kwargs)
+            return
+        with self.profiler.stage('doc_build', flowables=len(story)):
+            doc.build(story, canvasmaker=profiled_canvas(self.profiler), **kwargs)
 
-        self._create_summary_page(story)
+    def _render_pages(self, story, header=True):
+        """Render a story on its own into deterministic PDF bytes."""
+        buffer = io.BytesIO()
+        self._build(self._new_doc(buffer, invariant=True), story, header)
+        return buffer.getvalue()
 
+    def _summary_story(self):
+        story = []
+        with self.profiler.stage('summary_page'):
+            self._create_summary_page(story)
+        return story
+
+    def _add_player_page(self, player, story):
+        with self.profiler.stage('player_page', player=player):
+            self._create_player_page(self.player_rows[player], story)
+
+    def _player_page_key(self, player_rows):
+        """Content hash of everything a pitcher's page is drawn from."""
+        digest = hashlib.sha256(f"layout-{PAGE_LAYOUT_VERSION}".encode('utf-8'))
+        if self.logo_path:
+            digest.update(_logo_digest(self.logo_path).encode('ascii'))
+        for rows in player_rows:
+            digest.update(','.join(map(str, rows.columns)).encode('utf-8'))
+            digest.update(pd.util.hash_pandas_object(rows, index=False).to_numpy().tobytes())
+        if not player_rows.main.empty:
+            main_row = player_rows.main.iloc[0]
+            percentiles = self._calculate_percentiles(main_row)
+            digest.update(json.dumps([percentiles, self._pitcher_bands(main_row)],
+                                     sort_keys=True, default=str).encode('utf-8'))
+            key = (main_row['team_id'], main_row['player'])
+            comparables = self.comparables.get((int(key[0]), str(key[1])))
+            if comparables is not None:
+                digest.update(pd.util.hash_pandas_object(comparables, index=False).to_numpy().tobytes())
+            if self.split_percentiles is not None and key in self.split_percentiles.index:
+                digest.update(self.split_percentiles.loc[key].to_numpy().tobytes())
+            for year, row, season_percentiles in self.season_history(main_row)[:-1]:
+                digest.update(json.dumps([year, row.astype(str).to_dict(), season_percentiles],
+                                         sort_keys=True).encode('utf-8'))
+        return digest.hexdigest()
+
+    def _pitcher_order(self):
         main_pitchers = self._get_main_pitcher_data()
         main_pitchers = main_pitchers.sort_values('ip', ascending=False)
-        unique_players = main_pitchers['player'].unique()
+        return main_pitchers['player'].unique()
 
-        for player in unique_players:
-            player_data = self.df[self.df['player'] == player]
-            self._create_player_page(player_data, story)
+    def team_data(self):
+        """Summary totals and conference rankings as plain values.
 
-        doc.build(story)
+        The summary page of the PDF and the JSON/HTML previews are all
+        drawn from this.
+        """
+        team_stats = self._calculate_team_stats()
+        year = self.df['year'].iloc[0] if 'year' in self.df.columns else datetime.now().year
+        rankings = {}
+        if self.conference_team_totals is not None:
+            for stat_name, label in self.ranking_charts:
+                ranking = self.team_ranking(team_stats, stat_name)
+                rankings[stat_name] = {
+                    'label': label, 'format': ranking['format'], 'lower_better': ranking['lower_better'],
+                    **{key: json_value(ranking[key]) for key in ('value', 'rank', 'teams', 'best', 'worst')},
+                    'values': [json_value(value) for value in ranking['values']],
+                }
+        return {'name': self.team_name, 'year': json_value(year),
+                'summary': {key: json_value(int(value) if key in ('so', 'bb', 'h') else value)
+                            for key, value in team_stats.items()},
+                'rankings': rankings}
+
+    def pitcher_data(self, player_rows, bands=True):
+        """Everything a pitcher page shows, as plain values (None for missing).
+
+        The PDF pitcher page and the JSON/HTML previews are all drawn from
+        this. With ``bands`` false the bootstrap percentile bands are left
+        empty.
+        """
+        main_row = player_rows.main.iloc[0]
+        line = {column: json_value(main_row[column]) for column in PREVIEW_LINE_COLUMNS
+                if column in main_row.index}
+        for column in PREVIEW_COUNT_COLUMNS:
+            if line.get(column) is not None:
+                line[column] = int(line[column])
+        line['whip'] = json_value(_row_stat_value(main_row, 'whip'))
+        so, bb = line.get('so'), line.get('bb')
+        line['k_bb_ratio'] = so / max(bb, 1) if so is not None and bb is not None else None
+
+        splits = []
+        for display, row, pct in self._situational_lines(main_row, player_rows.splits):
+            split = {'label': display, 'ops_percentile': int(pct) if pd.notna(pct) else None}
+            split.update({stat: json_value(row[stat]) for stat in ['ip', 'BAA', 'ops']})
+            split.update({stat: int(row[stat]) if pd.notna(row[stat]) else None for stat in ['h', 'bb', 'so']})
+            splits.append(split)
+
+        history = []
+        for year, row, season_percentiles in self.season_history(main_row):
+            season = {'year': year, 'percentiles': season_percentiles,
+                      'whip': json_value(_row_stat_value(row, 'whip'))}
+            season.update({stat: json_value(row[stat])
+                           for stat in ['ip', 'era', 'k_perc', 'bb_perc', 'ops']})
+            history.append(season)
+
+        comparables = []
+        found = self.comparables.get((int(main_row['team_id']), str(main_row['player'])))
+        if found is not None:
+            # Column lists rather than iterrows, which builds a Series per row
+            stats = ['ip', 'era', 'k_perc', 'bb_perc', 'ops', 'distance']
+            columns = [found[column].tolist() for column in stats]
+            for player, team_id, *values in zip(found['player'].tolist(), found['team_id'].tolist(), *columns):
+                comparable = {'player': str(player), 'team_id': int(team_id), 'team': _team_label(team_id)}
+                comparable.update({stat: json_value(value) for stat, value in zip(stats, values)})
+                comparables.append(comparable)
+
+        return {
+            'player': str(main_row['player']),
+            'number': json_value(main_row['number']),
+            **{field: str(main_row[field]) if pd.notna(main_row[field]) else default
+               for field, default in [('yr', 'N/A'), ('pos', 'P'), ('b_t', 'N/A')]},
+            'line': line,
+            'percentiles': self._calculate_percentiles(main_row) or {},
+            'percentile_bands': ({label: list(band) for label, band in self._pitcher_bands(main_row).items()}
+                                 if bands else {}),
+            'splits': splits,
+            'history': history,
+            'comparables': comparables,
+        }
+
+    def report_data(self, bands=True):
+        """The whole report (summary plus pitchers in report order) as plain values."""
+        pitchers = []
+        for player in self._pitcher_order():
+            with self.profiler.stage('pitcher_data', player=player):
+                pitchers.append(self.pitcher_data(self.player_rows[player], bands))
+        with self.profiler.stage('team_data'):
+            team = self.team_data()
+        return {'team': team, 'pitchers': pitchers}
+
+    def generate_preview(self, output_format, bands=False):
+        """Write the report as ``json`` or ``html`` next to where the PDF would go.
+
+        The bootstrap percentile bands cost about as much as the rest of a
+        preview, so they are only drawn with ``bands``.
+        """
+        render = {'json': render_json, 'html': render_html}[output_format]
+        output_file = os.path.splitext(self.output_file)[0] + '.' + output_format
+        data = self.report_data(bands)
+        with self.profiler.stage('render_' + output_format):
+            text = render(data)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write(text)
+        print(f"Scouting report generated: {output_file}")
+        return output_file
+
+    def generate_report(self):
+        if self.cache_dir is not None or self._parallel_pages:
+            self._generate_merged_report()
+            return
+
+        doc = self._new_doc(self.output_file)
+
+        story = self._summary_story()
+
+        for player in self._pitcher_order():
+            self._add_player_page(player, story)
+
+        self._build(doc, story)
         print(f"Scouting report generated: {self.output_file}")
 
+    def _pitcher_fragments(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield ``(players, pdf_bytes)`` for the pitcher pages in report order.
+
+        With a cache directory every pitcher is its own cached fragment;
+        otherwise pages are rendered ``chunk_size`` pitchers at a time so
+        only one chunk of flowables is alive at once.
+        """
+        players = list(self._pitcher_order())
+        self.pages_reused = 0
+
+        if self.cache_dir is not None:
+            for player in players:
+                def render(player=player):
+                    story = []
+                    self._add_player_page(player, story)
+                    return self._render_pages(story)
+
+                with self.profiler.stage('cached_page', player=player):
+                    page, hit = cached_bytes(self._player_page_key(self.player_rows[player]),
+                                             render, 'pages', self.cache_dir)
+                self.pages_reused += hit
+                yield [player], page
+            return
+
+        for start in range(0, len(players), chunk_size):
+            chunk = players[start:start + chunk_size]
+            story = []
+            for player in chunk:
+                self._add_player_page(player, story)
+            yield chunk, self._render_pages(story)
+
+    @property
+    def _parallel_pages(self):
+        return bool(self.page_workers and self.page_workers > 1 and len(self.player_rows) > 1)
+
+    def _parallel_fragments(self):
+        """Render the summary and pitcher pages in a process pool.
+
+        Every pitcher is its own task and the summary is submitted first,
+        so it renders alongside the pitcher pages. Returns the summary
+        bytes and an iterator of ``(players, pdf_bytes)`` in report order;
+        results are consumed in submission order, so the merged PDF does
+        not depend on which worker finishes first. Cached pages (with a
+        cache directory) are read directly and only misses are rendered.
+        """
+        players = list(self._pitcher_order())
+        keys = {}
+        pages = {}
+        if self.cache_dir is not None:
+            for player in players:
+                keys[player] = self._player_page_key(self.player_rows[player])
+                page = load_bytes(keys[player], 'pages', self.cache_dir)
+                if page is not None:
+                    pages[player] = page
+        self.pages_reused = len(pages)
+
+        # Workers get a copy without the parent's profiler and record their own;
+        # its frames and conference tables are read from shared memory. The
+        # staff-wide bands are drawn once here rather than in every worker.
+        self.percentile_bands
+        worker_view = copy.copy(self)
+        worker_view.profiler = NULL_PROFILER
+        # ReportLab stylesheets do not unpickle; workers build their own
+        worker_view._styles = None
+        shared = SharedPayload(worker_view, SHARED_MEMORY_TYPES)
+        pool = ProcessPoolExecutor(
+            max_workers=min(self.page_workers, len(players) - len(pages) + 1),
+            initializer=_init_page_worker,
+            initargs=(shared.data, self.profiler.enabled, getattr(self.profiler, 'track_memory', False)))
+        summary_future = pool.submit(_render_page_task, None)
+        futures = {player: pool.submit(_render_page_task, player)
+                   for player in players if player not in pages}
+
+        def collect(future):
+            data, events = future.result()
+            if self.profiler.enabled:
+                self.profiler.events.extend(events)
+            return data
+
+        def fragments():
+            try:
+                for player in players:
+                    if player in futures:
+                        page = collect(futures[player])
+                        if self.cache_dir is not None:
+                            store_bytes(keys[player], page, 'pages', self.cache_dir)
+                        pages[player] = page
+                    yield [player], pages.pop(player)
+            finally:
+                pool.shutdown(cancel_futures=True)
+                shared.close()
+
+        try:
+            summary = collect(summary_future)
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            shared.close()
+            raise
+        return summary, fragments()
+
+    def write_pages(self, merger, chunk_size=STREAM_CHUNK_SIZE):
+        """Stream the summary and pitcher pages into a PdfMerger with bookmarks."""
+        if self._parallel_pages:
+            summary, fragments = self._parallel_fragments()
+        else:
+            summary = self._render_pages(self._summary_story())
+            fragments = self._pitcher_fragments(chunk_size)
+        with self.profiler.stage('pdf_merge'):
+            team_bookmark = merger.add_bookmark(self.team_name, merger.add_fragment(summary))
+
+        for players, fragment in fragments:
+            with self.profiler.stage('pdf_merge'):
+                first_page = merger.add_fragment(fragment)
+            for offset, player in enumerate(players):
+                merger.add_bookmark(str(player), first_page + offset, team_bookmark)
+
+    def _generate_merged_report(self):
+        """Build the report from per-pitcher page fragments (cached and/or rendered in parallel)."""
+        merger = PdfMerger(self.output_file)
+        self.write_pages(merger)
+        merger.close(title=f"{self.team_name} Pitching Scouting Report")
+        if self.cache_dir is not None:
+            print(f"Scouting report generated: {self.output_file} "
+                  f"({self.pages_reused}/{len(self._pitcher_order())} pitcher pages reused)")
+        else:
+            print(f"Scouting report generated: {self.output_file}")
+
+
+# Objects whose arrays and frames are handed to worker processes through
+# shared memory rather than pickled into each of them
+SHARED_MEMORY_TYPES = (PercentileIndex, SplitPercentileIndex, ComparablesIndex,
+                       ScoutingReportGenerator)
+
+# Generator a page-rendering worker process draws its pages from
+_page_worker_state = {}
+
+
+def _init_page_worker(shared_generator, profile, track_memory):
+    _page_worker_state['generator'] = load_shared(shared_generator)
+    _page_worker_state['profile'] = (profile, track_memory)
+
+
+def _render_page_task(player):
+    """Render one pitcher page (or the summary page for ``None``) in a worker."""
+    generator = _page_worker_state['generator']
+    profile, track_memory = _page_worker_state['profile']
+    generator.profiler = StageProfiler(track_memory=track_memory) if profile else NULL_PROFILER
+    if player is None:
+        data = generator._render_pages(generator._summary_story())
+    else:
+        story = []
+        generator._add_player_page(player, story)
+        data = generator._render_pages(story)
+    return data, list(generator.profiler.events)
+
+
+# Generator settings shared by every report rendered in a worker process
+_worker_context = {}
+
+
+def _init_worker(context):
+    _worker_context.clear()
+    _worker_context.update(context)
+
+
+def _init_shared_worker(shared_context):
+    _init_worker(load_shared(shared_context))
+
+
+def _render_team_report(job):
+    team_source, team_name, output_dir = job
+    context = dict(_worker_context)
+    profile, track_memory = context.pop('profile', False), context.pop('profile_memory', False)
+    output_format = context.pop('output_format', 'pdf')
+    preview_bands = context.pop('preview_bands', False)
+    if profile:
+        context['profiler'] = StageProfiler(track_memory=track_memory)
 
-if __name__ == "__main__":
     generator = ScoutingReportGenerator(
-        csv_file="gordon_pitching.csv",
-        conference_csv="conference_all_pitchers.csv"
+        team_source,
+        team_name=team_name,
+        output_dir=output_dir,
+        **context
     )
-    generator.generate_report()
-
-    print("PDF scouting report created successfully!")
+    with generator.profiler.stage('team_report', team=generator.team_name):
+        if output_format == 'pdf':
+            generator.generate_report()
+            output_file = generator.output_file
+        else:
+            output_file = generator.generate_preview(output_format, preview_bands)
+    return output_file, list(generator.profiler.events)
+
+
+def _build_jobs(team_csvs, conference_raw, output_dir, cache_dir=None, sources=None):
+    """``(team source, team name, output_dir)`` per report.
+
+    The files (and directories) the teams were read from are appended to
+    ``sources`` when it is given, so callers can watch them for changes.
+    """
+    sources = [] if sources is None else sources
+    if team_csvs:
+        paths = []
+        jobs = []
+        for pattern in team_csvs:
+            if os.path.isdir(pattern):
+                # A directory of team files is loaded concurrently and validated as a whole
+                from cne_ingest import load_team_directory
+                dataset = load_team_directory(pattern, cache_dir=cache_dir)
+                jobs.extend((dataset.teams[team_id], team_name_for(team_id, source), output_dir)
+                            for team_id, source in dataset.sources.items())
+                # The directory itself changes when team files are added or removed
+                sources.append(pattern)
+                sources.extend(dataset.sources.values())
+                continue
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                raise FileNotFoundError(f"No team CSV matches '{pattern}'")
+            paths.extend(m for m in matches if m not in paths)
+        sources.extend(paths)
+        return jobs + [(path, None, output_dir) for path in paths]
+
+    # No files given: one report per team_id in the conference file
+    if conference_raw is None:
+        raise ValueError("A conference CSV is required to derive teams by team_id")
+    jobs = []
+    for team_id, team_df in conference_raw.groupby('team_id', sort=True):
+        jobs.append((team_df.reset_index(drop=True), team_name_for(team_id), output_dir))
+    return jobs
+
+
+def _create_book_contents(plan, first_page, styles):
+    """Table of contents story for a book; ``plan`` is ``[(team_name, players)]``."""
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+    from reportlab.platypus import PageBreak, Paragraph, Table, TableStyle
+    story = [Paragraph("CONFERENCE PITCHING BOOK", styles['CustomTitle']),
+             Paragraph("Contents", styles['SectionHeader'])]
+
+    rows = [['Team / Pitcher', 'Page']]
+    team_rows = []
+    page = first_page
+    for team_name, players in plan:
+        team_rows.append(len(rows))
+        rows.append([team_name, str(page)])
+        page += 1
+        for player in players:
+            rows.append([f"    {player}", str(page)])
+            page += 1
+
+    table = Table(rows, colWidths=[5.5 * inch, 1 * inch], repeatRows=1)
+    style = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1f4788')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+        ('FONTSIZE', (0, 1), (-1, -1), 9),
+        ('LINEBELOW', (0, 0), (-1, -1), 0.25, colors.HexColor('#cccccc')),
+    ]
+    style += [('FONTNAME', (0, row), (-1, row), 'Helvetica-Bold') for row in team_rows]
+    table.setStyle(TableStyle(style))
+    story.append(table)
+    story.append(PageBreak())
+    return story
+
+
+def generate_book(generators, output_file, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream several team reports into one PDF with contents, outline and bookmarks.
+
+    Pages are rendered a chunk at a time and written straight to disk, so
+    memory does not grow with the number of pages.
+    """
+    if not generators:
+        raise ValueError("No teams to put in the book")
+
+    plan = [(generator.team_name, list(generator._pitcher_order())) for generator in generators]
+    render_doc = generators[0]
+
+    # Every team gets a one-page summary and every pitcher one page, so page
+    # numbers are known before anything is rendered
+    contents_pages = count_pages(render_doc._render_pages(
+        _create_book_contents(plan, 1, render_doc.styles), header=False))
+    contents = render_doc._render_pages(
+        _create_book_contents(plan, contents_pages + 1, render_doc.styles), header=False)
+
+    merger = PdfMerger(output_file)
+    merger.add_bookmark("Contents", merger.add_fragment(contents))
+    for generator in generators:
+        generator.write_pages(merger, chunk_size)
+
+    expected_pages = contents_pages + sum(1 + len(players) for _, players in plan)
+    if merger.page_count != expected_pages:
+        print(f"Warning: book has {merger.page_count} pages, contents assumed {expected_pages}")
+
+    merger.close(title="Conference Pitching Book")
+    print(f"Conference book generated: {output_file} ({merger.page_count} pages)")
+    return output_file
+
+
+def run_batch(team_csvs=None, conference_csv="conference_all_pitchers.csv",
+              workers=None, output_dir=None, cache_dir=None, book=None,
+              chunk_size=STREAM_CHUNK_SIZE, profile=None, profile_memory=False,
+              page_workers=None, warehouse=None, output_format='pdf', stream=False,
+              preview_bands=False):
+    """Render one report per team, loading the conference data only once.
+
+    With ``book`` set, all teams are streamed into that single PDF instead,
+    and ``workers`` (unless ``page_workers`` is given) render each team's
+    pitcher pages.
+    With ``profile`` set to a path, stage timings from every report are
+    written there as a trace-event file and summarized on stdout.
+    ``page_workers`` renders each report's pitcher pages in that many
+    processes; it is meant for few teams on many cores, and is combined
+    with ``workers`` only if both are set explicitly. Worker processes
+    read the conference tables from shared memory rather than each
+    receiving a pickled copy. ``warehouse`` is the
+    path of a StatWarehouse whose earlier seasons are added to each
+    pitcher page. ``output_format`` 'json' or 'html' writes a lightweight
+    preview per team from the same computed data instead of a PDF, with
+    the bootstrap percentile bands only if ``preview_bands`` is set.
+    With ``stream`` set, the conference file (a CSV, or an ``.npz`` sketch
+    from cne_sketches.py) is only summarized into percentile sketches and
+    team totals, so national-scale files fit in bounded memory; situational
+    percentiles and comparable pitchers, which need every row, are left
+    out, and team CSVs must be given.
+    """
+    profiler = StageProfiler(track_memory=profile_memory) if profile else NULL_PROFILER
+    if warehouse:
+        from cne_warehouse import StatWarehouse
+        warehouse = StatWarehouse(warehouse)
+    conference_raw = None
+    conference_df = None
+    conference_totals = None
+    percentile_index = None
+    split_index = None
+    comparables_index = None
+    if stream:
+        if not team_csvs:
+            raise ValueError("Streaming the conference file needs team CSVs to report on")
+        from cne_sketches import ConferenceSketch
+        with profiler.stage('conference_sketch', path=conference_csv):
+            summary = ConferenceSketch.from_paths([conference_csv])
+        percentile_index = summary.percentile_index()
+        conference_totals = summary.team_totals()
+        print(f"Summarized conference data with {summary.pitchers} pitchers "
+              f"(percentiles within +/-{summary.error_bound * 100:.1f} points)")
+    elif conference_csv and os.path.exists(conference_csv):
+        with profiler.stage('load_conference_csv', path=conference_csv):
+            if team_csvs:
+                conference_df = load_conference_main(conference_csv, cache_dir)
+                conference_splits = load_conference_splits(conference_csv, cache_dir)
+            else:
+                conference_raw = load_conference_data(conference_csv, cache_dir)
+                conference_df = filter_main_rows(conference_raw)
+                conference_splits = conference_raw
+        with profiler.stage('percentile_index'):
+            percentile_index = PercentileIndex(conference_df)
+        conference_splits = split_pivot(conference_splits)
+        with profiler.stage('split_percentile_index'):
+            split_index = SplitPercentileIndex(conference_splits)
+        with profiler.stage('comparables_index'):
+            comparables_index = ComparablesIndex(conference_df, conference_splits)
+        with profiler.stage('conference_team_totals'):
+            conference_totals = compute_team_totals(conference_df)
+        print(f"Loaded conference data with {len(conference_df)} pitchers")
+
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    jobs = _build_jobs(team_csvs, conference_raw, output_dir, cache_dir)
+
+    if book:
+        # Teams go into the book one after another, so the worker processes
+        # render each team's pitcher pages instead
+        book_page_workers = page_workers or workers
+        generators = [ScoutingReportGenerator(team_source, conference_df=conference_df,
+                                              percentile_index=percentile_index,
+                                              split_index=split_index,
+                                              comparables_index=comparables_index,
+                                              conference_totals=conference_totals,
+                                              team_name=team_name, cache_dir=cache_dir,
+                                              profiler=profiler, page_workers=book_page_workers,
+                                              warehouse=warehouse)
+                      for team_source, team_name, _ in jobs]
+        if output_dir:
+            book = os.path.join(output_dir, book)
+        outputs = [generate_book(generators, book, chunk_size)]
+        _prune_page_cache(cache_dir)
+        _report_profile(profile, profiler.events)
+        return outputs
+
+    if page_workers and page_workers > 1 and not workers:
+        workers = 1
+    workers = min(workers or os.cpu_count() or 1, len(jobs)) if jobs else 1
+    context = {
+        'conference_df': conference_df,
+        'percentile_index': percentile_index,
+        'split_index': split_index,
+        'comparables_index': comparables_index,
+        'conference_totals': conference_totals,
+        'cache_dir': cache_dir,
+        'profile': bool(profile),
+        'profile_memory': profile_memory,
+        'page_workers': page_workers,
+        'warehouse': warehouse,
+        'output_format': output_format,
+        'preview_bands': preview_bands,
+    }
+
+    if workers <= 1:
+        _init_worker(context)
+        results = [_render_team_report(job) for job in jobs]
+    else:
+        # Workers attach to the conference tables instead of each unpickling a copy
+        with SharedPayload(context, SHARED_MEMORY_TYPES) as shared, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_shared_worker,
+                                    initargs=(shared.data,)) as pool:
+            results = list(pool.map(_render_team_report, jobs))
+
+    _prune_page_cache(cache_dir)
+    _report_profile(profile, list(profiler.events) + [event for _, events in results for event in events])
+    return [output_file for output_file, _ in results]
+
+
+def _prune_page_cache(cache_dir):
+    if cache_dir is not None:
+        prune_bytes('pages', cache_dir)
+
+
+def _report_profile(path, events):
+    if not path:
+        return
+    write_trace(events, path)
+    print(f"\nStage timings (trace written to {path}):")
+    print(format_summary(events))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate pitching scouting reports for one or more teams.")
+    parser.add_argument('team_csvs', nargs='*',
+                        help="Team CSV files, glob patterns or directories of *_pitching.csv "
+                             "files (loaded concurrently and validated). If omitted, a report is "
+                             "built for every team_id in the conference file.")
+    parser.add_argument('-c', '--conference', default="conference_all_pitchers.csv",
+                        help="Conference CSV used for percentiles and rankings")
+    parser.add_argument('--stream', action='store_true',
+                        help="Summarize the conference CSV (or .npz sketch) in bounded memory "
+                             "with approximate percentiles, for national-scale files")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: CPU count; with --book, "
+                             "the processes rendering each team's pitcher pages, default serial)")
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="Directory the PDF reports are written to")
+    parser.add_argument('-f', '--format', choices=['pdf', 'json', 'html'], default='pdf',
+                        help="Output format: printable PDF (default), or JSON data / "
+                             "an HTML page for quick previews")
+    parser.add_argument('--bands', action='store_true',
+                        help="Also compute the bootstrap percentile bands for a JSON/HTML "
+                             "preview (slower; PDFs always have them)")
+    parser.add_argument('--book', default=None,
+                        help="Write every team into this single PDF (contents, outline "
+                             "and bookmarks) instead of one report per team")
+    parser.add_argument('-p', '--page-workers', type=int, default=None,
+                        help="Render each report's pitcher pages in this many worker "
+                             "processes (default: serial; teams then run one at a time "
+                             "unless --workers is given)")
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE,
+                        help="Pitcher pages rendered per pass when streaming a book")
+    parser.add_argument('--profile', default=None, metavar='TRACE_JSON',
+                        help="Record per-stage timings and write a trace-event file "
+                             "(open in chrome://tracing or Perfetto)")
+    parser.add_argument('--profile-memory', action='store_true',
+                        help="Also record peak allocation per stage (slower)")
+    parser.add_argument('--warehouse', default=None, metavar='DB',
+                        help="Stat warehouse (see cne_warehouse.py) whose earlier seasons "
+                             "are shown on each pitcher page")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Directory for the parsed-CSV cache (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always re-parse the CSVs instead of using the cache")
+    args = parser.parse_args(argv)
+    if args.book and args.format != 'pdf':
+        parser.error("--book is only written as a PDF")
+    if args.bands and args.format == 'pdf':
+        parser.error("--bands is for -f json/html previews; PDFs always have the bands")
+    if args.stream and not args.team_csvs:
+        parser.error("--stream needs the team CSVs to report on")
+    return args
+
+
+def main(argv=None):
+    from cne_ingest import ValidationError
+    args = parse_args(argv)
+    cache_dir = None if args.no_cache else args.cache_dir
+    try:
+        outputs = run_batch(args.team_csvs, args.conference, args.workers, args.output_dir,
+                            cache_dir, args.book, args.chunk_size, args.profile,
+                            args.profile_memory, args.page_workers, args.warehouse, args.format,
+                            args.stream, args.bands)
+    except ValidationError as exc:
+        raise SystemExit(str(exc))
+
+    print(f"{len(outputs)} {args.format.upper()} scouting report(s) created successfully!")
+    if args.format != 'pdf':
+        return
     print("\nLayout: ")
     print("- Page 1: Team summary with conference rankings")
-    print("- Each player: One page with stats/situational (top), percentiles/notes (bottom)")
\ No newline at end of file
+    print("- Each player: One page with stats/situational (top), percentiles/notes (bottom)")
+
+
+if __name__ == "__main__":
+    main()
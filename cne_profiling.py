@@ -0,0 +1,110 @@
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+
+class NullProfiler:
+    """Profiler used when instrumentation is off; every hook is a no-op."""
+
+    enabled = False
+    events = ()
+
+    _null_stage = contextlib.nullcontext()
+
+    def stage(self, name, **args):
+        return self._null_stage
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class StageProfiler:
+    """Records wall time, call counts and (optionally) peak allocation per stage.
+
+    Stages nest; each finished stage becomes one Chrome trace-event
+    ("ph": "X") so a run can be opened in chrome://tracing or Perfetto.
+    Peak allocation uses tracemalloc and is only tracked with
+    ``track_memory=True`` because tracing allocations slows the run down.
+    """
+
+    enabled = True
+
+    def __init__(self, track_memory=False):
+        self.track_memory = track_memory
+        self.events = []
+        self._origin = time.perf_counter()
+        self._memory_stack = []
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextlib.contextmanager
+    def stage(self, name, **args):
+        if self.track_memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._memory_stack:
+                self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._memory_stack.append([current, current])
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            event = {
+                'name': name,
+                'ph': 'X',
+                'ts': (start - self._origin) * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': os.getpid(),
+                'tid': threading.get_ident(),
+            }
+            if self.track_memory:
+                base, peak_seen = self._memory_stack.pop()
+                peak_seen = max(peak_seen, tracemalloc.get_traced_memory()[1])
+                if self._memory_stack:
+                    self._memory_stack[-1][1] = max(self._memory_stack[-1][1], peak_seen)
+                args = dict(args, peak_alloc_bytes=peak_seen - base)
+            if args:
+                event['args'] = {key: str(value) if not isinstance(value, (int, float)) else value
+                                 for key, value in args.items()}
+            self.events.append(event)
+
+
+def summarize(events):
+    """Aggregate trace events per stage name: calls, total/mean/max ms, peak bytes."""
+    summary = {}
+    for event in events:
+        stats = summary.setdefault(event['name'], {'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                                                   'peak_alloc_bytes': None})
+        duration = event['dur'] / 1000
+        stats['calls'] += 1
+        stats['total_ms'] += duration
+        stats['max_ms'] = max(stats['max_ms'], duration)
+        peak = event.get('args', {}).get('peak_alloc_bytes')
+        if peak is not None:
+            stats['peak_alloc_bytes'] = max(stats['peak_alloc_bytes'] or 0, peak)
+    for stats in summary.values():
+        stats['mean_ms'] = stats['total_ms'] / stats['calls']
+    return summary
+
+
+def format_summary(events):
+    """Plain-text table of ``summarize(events)``, slowest stages first."""
+    summary = summarize(events)
+    lines = [f"{'Stage':<24}{'Calls':>7}{'Total ms':>12}{'Mean ms':>10}{'Max ms':>10}{'Peak MiB':>10}"]
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]['total_ms']):
+        peak = stats['peak_alloc_bytes']
+        peak_text = f"{peak / 2 ** 20:.2f}" if peak is not None else '-'
+        lines.append(f"{name:<24}{stats['calls']:>7}{stats['total_ms']:>12.1f}"
+                     f"{stats['mean_ms']:>10.2f}{stats['max_ms']:>10.2f}{peak_text:>10}")
+    return '\n'.join(lines)
+
+
+def write_trace(events, path):
+    """Write events as a Chrome trace-event JSON file."""
+    with open(path, 'w') as f:
+        json.dump({'traceEvents': list(events), 'displayTimeUnit': 'ms'}, f)
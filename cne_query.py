@@ -0,0 +1,195 @@
+import argparse
+import json
+import sys
+import time
+
+
+# Heavy imports (pandas, the stats layer) happen inside main() so --help is
+# instant and --timing can report them; ReportLab is never imported here.
+
+
+def _format(value, spec):
+    return 'N/A' if value is None else format(value, spec)
+
+
+_LINE_FORMATS = [
+    ('ip', 'IP', ''), ('era', 'ERA', '.2f'), ('whip', 'WHIP', '.2f'), ('so', 'SO', ''),
+    ('bb', 'BB', ''), ('BAA', 'BAA', '.3f'), ('ops', 'OPS', '.3f'), ('k_perc', 'K%', '.1%'),
+    ('bb_perc', 'BB%', '.1%'), ('groundout_perc', 'GB%', '.1%'),
+]
+
+
+def pitcher_report(conference_df, percentile_index, player, team_id=None):
+    """Season line and conference percentiles for every pitcher matching ``player``."""
+    from cne_pitching_reports import PREVIEW_LINE_COLUMNS, _row_stat_value, _team_label
+    from cne_report_formats import json_value
+
+    names = conference_df['player'].astype(str).str.casefold().to_numpy()
+    matches = conference_df[names == player.casefold()]
+    if team_id is not None:
+        matches = matches[matches['team_id'].to_numpy() == team_id]
+
+    pitchers = []
+    for _, row in matches.iterrows():
+        line = {column: json_value(row[column]) for column in PREVIEW_LINE_COLUMNS}
+        line['whip'] = json_value(_row_stat_value(row, 'whip'))
+        pitchers.append({
+            'player': str(row['player']),
+            'team_id': int(row['team_id']),
+            'team': _team_label(row['team_id']),
+            'year': json_value(row['year']),
+            'line': line,
+            'percentiles': percentile_index.percentiles(row),
+        })
+    return pitchers
+
+
+def team_report(conference_totals, team):
+    """Team totals and conference rank for every RANKING_STATS entry."""
+    from cne_pitching_reports import RANKING_STATS, _team_label, team_names, team_ranking
+    from cne_report_formats import json_value
+
+    if team.isdigit():
+        team_id = int(team)
+    else:
+        ids = [tid for tid, stem in team_names().items() if stem == team.casefold()]
+        if not ids:
+            raise KeyError(f"Unknown team {team!r}; use its team_id or put its "
+                           f"{team.casefold()}_pitching.csv in the current directory")
+        team_id = ids[0]
+    if team_id not in conference_totals.index:
+        raise KeyError(f"team_id {team_id} is not in the conference file")
+
+    team_stats = conference_totals.loc[team_id]
+    rankings = {}
+    for stat_name in RANKING_STATS:
+        ranking = team_ranking(conference_totals, team_stats, stat_name)
+        rankings[stat_name] = {key: json_value(ranking[key])
+                               for key in ('value', 'rank', 'teams', 'best', 'worst')}
+        rankings[stat_name]['format'] = ranking['format']
+    return {'team_id': team_id, 'team': _team_label(team_id), 'rankings': rankings}
+
+
+def split_report(conference_splits, situation, stat='ops', team_id=None, top=10, min_ab=None):
+    """Best pitchers in one situation by one split stat, conference-wide or on one staff."""
+    from cne_pitching_reports import (
+        SITUATION_LABELS, SPLIT_MIN_AB, SPLIT_PERCENTILE_STATS, _team_label, split_leaderboard,
+        split_pivot,
+    )
+    from cne_report_formats import json_value
+
+    codes = {code: code for code in SITUATION_LABELS}
+    codes.update({label.casefold(): code for code, label in SITUATION_LABELS.items()})
+    code = codes.get(situation.casefold())
+    if code is None:
+        raise KeyError(f"Unknown situation {situation!r}; use one of {', '.join(SITUATION_LABELS)}")
+
+    pivot = split_pivot(conference_splits)
+    if team_id is not None:
+        pivot = pivot[pivot.index.get_level_values('team_id') == team_id]
+    board = split_leaderboard(pivot, code, stat, SPLIT_PERCENTILE_STATS[stat]['lower_better'],
+                              SPLIT_MIN_AB if min_ab is None else min_ab, top)
+    leaders = [{'player': str(player), 'team_id': int(tid), 'team': _team_label(tid),
+                'AB': int(ab), stat: json_value(value)}
+               for player, tid, ab, value in zip(board['player'], board['team_id'], board['AB'], board[stat])]
+    return {'situation': code, 'label': SITUATION_LABELS[code], 'stat': stat, 'team_id': team_id,
+            'leaders': leaders}
+
+
+def _print_pitcher(pitcher):
+    print(f"{pitcher['player']} ({pitcher['team']}, {pitcher['year']})")
+    line = pitcher['line']
+    print('  ' + '  '.join(f"{label} {_format(line[key], spec)}" for key, label, spec in _LINE_FORMATS))
+    if pitcher['percentiles']:
+        print('  Percentiles: ' + '  '.join(f"{label} {value}"
+                                             for label, value in pitcher['percentiles'].items()))
+
+
+def _print_team(report):
+    print(f"{report['team']} ({report['team_id']})")
+    for stat_name, ranking in report['rankings'].items():
+        spec = ranking['format']
+        print(f"  {stat_name:<15}{_format(ranking['value'], spec):>8}   "
+              f"rank {ranking['rank']}/{ranking['teams']}   "
+              f"best {_format(ranking['best'], spec)}  worst {_format(ranking['worst'], spec)}")
+
+
+def _print_split(report):
+    scope = f"team_id {report['team_id']}" if report['team_id'] is not None else "conference"
+    print(f"{report['label']}: best {report['stat']} against ({scope})")
+    for rank, leader in enumerate(report['leaders'], 1):
+        print(f"  {rank:>2}. {leader['player']:<24}{leader['team']:<16}{leader['AB']:>4} AB  "
+              f"{_format(leader[report['stat']], '.3f')}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Print a pitcher's or team's stats, percentiles and rankings without "
+                    "building a PDF.")
+    parser.add_argument('kind', choices=['pitcher', 'team', 'split'])
+    parser.add_argument('name', help="Pitcher name, team_id / team file stem, or situation "
+                                     "for a split leaderboard (e.g. risp, vs_lhb)")
+    parser.add_argument('--team', type=int, default=None,
+                        help="team_id, to pick one of several pitchers with the same name "
+                             "or to rank one staff's splits")
+    parser.add_argument('--stat', choices=['ops', 'BAA'], default='ops',
+                        help="Split stat to rank by (default: %(default)s)")
+    parser.add_argument('--top', type=int, default=10, help="Pitchers listed in a split leaderboard")
+    parser.add_argument('-c', '--conference', default="conference_all_pitchers.csv",
+                        help="Conference CSV used for percentiles and rankings")
+    parser.add_argument('--json', action='store_true', help="Print JSON instead of text")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Always re-parse the CSV instead of using the cache")
+    parser.add_argument('--timing', action='store_true',
+                        help="Report import, load and query time on stderr")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    from cne_cache import DEFAULT_CACHE_DIR
+    from cne_pitching_reports import (
+        PercentileIndex, compute_team_totals, load_conference_main, load_conference_splits,
+    )
+    imported = time.perf_counter()
+
+    cache_dir = None if args.no_cache else DEFAULT_CACHE_DIR
+    if args.kind == 'split':
+        conference_df = load_conference_splits(args.conference, cache_dir)
+    else:
+        conference_df = load_conference_main(args.conference, cache_dir)
+    loaded = time.perf_counter()
+
+    if args.kind == 'split':
+        try:
+            result = split_report(conference_df, args.name, args.stat, args.team, args.top)
+        except KeyError as exc:
+            raise SystemExit(exc.args[0])
+    elif args.kind == 'pitcher':
+        result = pitcher_report(conference_df, PercentileIndex(conference_df), args.name, args.team)
+        if not result:
+            raise SystemExit(f"No pitcher named {args.name!r} in {args.conference}")
+    else:
+        try:
+            result = team_report(compute_team_totals(conference_df), args.name)
+        except KeyError as exc:
+            raise SystemExit(exc.args[0])
+    queried = time.perf_counter()
+
+    if args.json:
+        print(json.dumps(result, indent=1, allow_nan=False))
+    elif args.kind == 'split':
+        _print_split(result)
+    elif args.kind == 'pitcher':
+        for pitcher in result:
+            _print_pitcher(pitcher)
+    else:
+        _print_team(result)
+
+    if args.timing:
+        reportlab = any(module.startswith('reportlab') for module in sys.modules)
+        print(f"imports {(imported - start) * 1000:.0f} ms, load {(loaded - imported) * 1000:.0f} ms, "
+              f"query {(queried - loaded) * 1000:.0f} ms; ReportLab imported: "
+              f"{'yes' if reportlab else 'no'}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
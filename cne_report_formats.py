@@ -0,0 +1,175 @@
+import html
+import json
+import math
+
+
+def percentile_rgb(percentile):
+    """Blue (0) - white (50) - red (100) gradient for a percentile marker, as 0-255 RGB."""
+    if percentile <= 50:
+        ratio = percentile / 50
+        r = int(41 + (255 - 41) * ratio)
+        g = int(82 + (255 - 82) * ratio)
+        b = int(163 + (255 - 163) * ratio)
+    else:
+        ratio = (percentile - 50) / 50
+        r = int(255 - (255 - 204) * ratio)
+        g = int(255 - 255 * ratio)
+        b = int(255 - 255 * ratio)
+    return r, g, b
+
+
+def percentile_band_rgb(percentile):
+    """Muted marker colour for the uncertainty band behind a percentile marker, as 0-255 RGB."""
+    # Mixed with light grey so a band around 50 still shows against the page
+    return tuple(int(0.45 * c + 0.55 * 208) for c in percentile_rgb(percentile))
+
+
+def json_value(value):
+    """Plain JSON value for a pandas/NumPy scalar; NaN and inf become None."""
+    if value is None:
+        return None
+    if hasattr(value, 'item'):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    try:
+        if value != value:  # pd.NA / NaT compare as missing
+            return None
+    except TypeError:
+        return None
+    return value
+
+
+def render_json(report):
+    """Report data (ScoutingReportGenerator.report_data) as a JSON document."""
+    return json.dumps(report, indent=1, allow_nan=False)
+
+
+def format_stat(value, spec='.2f', percent=False, missing='N/A'):
+    """Display text of a report_data value; shared by the PDF and HTML backends."""
+    if value is None:
+        return missing
+    if percent:
+        return f"{value * 100:.1f}%"
+    return f"{value:{spec}}" if spec else str(value)
+
+
+def _percentile_svg(percentiles, bands):
+    """Inline SVG of the percentile bars and their bands, same geometry as the PDF drawing."""
+    bar_start, bar_length = 80, 580
+    height = 35 * len(percentiles)
+    parts = [f'<svg class="pct" viewBox="0 0 {bar_start + bar_length + 50} {height}" '
+             f'xmlns="http://www.w3.org/2000/svg">']
+    y = 20
+    for label, percentile in percentiles.items():
+        parts.append(f'<text x="10" y="{y + 4}" font-style="italic" font-size="11">{html.escape(label)}</text>'
+                     f'<line x1="{bar_start}" y1="{y}" x2="{bar_start + bar_length}" y2="{y}" '
+                     f'stroke="#9b9b9b" stroke-width="2"/>')
+        for marker in (0, 50, 100):
+            parts.append(f'<circle cx="{bar_start + marker / 100 * bar_length:g}" cy="{y}" r="4" fill="#9b9b9b"/>')
+        band = bands.get(label)
+        if percentile is not None and band is not None and band[1] > band[0]:
+            r, g, b = percentile_band_rgb(percentile)
+            parts.append(f'<line x1="{bar_start + band[0] / 100 * bar_length:g}" y1="{y}" '
+                         f'x2="{bar_start + band[1] / 100 * bar_length:g}" y2="{y}" '
+                         f'stroke="rgb({r},{g},{b})" stroke-width="10" stroke-linecap="round"/>')
+        if percentile is not None:
+            x = bar_start + percentile / 100 * bar_length
+            r, g, b = percentile_rgb(percentile)
+            parts.append(f'<circle cx="{x:g}" cy="{y}" r="12" fill="rgb({r},{g},{b})" stroke="black"/>'
+                         f'<text x="{x:g}" y="{y + 3}" font-size="9" font-weight="bold" '
+                         f'text-anchor="middle">{int(percentile)}</text>')
+        y += 35
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def _table(header, rows, css_class=''):
+    head = ''.join(f'<th>{html.escape(str(cell))}</th>' for cell in header)
+    body = ''.join('<tr>' + ''.join(f'<td>{html.escape(str(cell))}</td>' for cell in row) + '</tr>'
+                   for row in rows)
+    return f'<table class="{css_class}"><tr>{head}</tr>{body}</table>'
+
+
+_STYLE = """
+body { font-family: Helvetica, Arial, sans-serif; margin: 1em; max-width: 60em; }
+h1 { color: #1f4788; } h2 { color: #c41e3a; border-bottom: 1px solid #ccc; }
+table { border-collapse: collapse; margin: 0.5em 0; font-size: 0.9em; }
+th { background: #1f4788; color: white; } td, th { border: 1px solid #999; padding: 2px 6px; }
+svg.pct { width: 100%; max-width: 45em; }
+"""
+
+
+def render_html(report):
+    """Self-contained HTML preview of the report data (no external assets)."""
+    team = report['team']
+    summary = team['summary']
+    out = ['<!DOCTYPE html><html><head><meta charset="utf-8">',
+           '<meta name="viewport" content="width=device-width, initial-scale=1">',
+           f"<title>{html.escape(team['name'])} Pitching Scouting Report</title>",
+           f'<style>{_STYLE}</style></head><body>',
+           f"<h1>{html.escape(team['name'])} pitching staff</h1>",
+           f"<p>Season: {html.escape(str(team['year']))}</p>"]
+
+    out.append(_table(['Team pitching', ''], [
+        ['Team ERA', format_stat(summary['era'])],
+        ['Team WHIP', format_stat(summary['whip'])],
+        ['Total Innings', format_stat(summary['ip'], '.1f')],
+        ['Total Strikeouts', format_stat(summary['so'], 'd')],
+        ['Total Walks', format_stat(summary['bb'], 'd')],
+        ['K/BB Ratio', format_stat(summary['k_bb_ratio'])],
+        ['Hits Allowed', format_stat(summary['h'], 'd')],
+        ['BAA', format_stat(summary['BAA'], '.3f')],
+        ['OPS Against', format_stat(summary['ops'], '.3f')],
+        ['K%', format_stat(summary['k_perc'], percent=True)],
+        ['BB%', format_stat(summary['bb_perc'], percent=True)],
+    ]))
+
+    if team['rankings']:
+        out.append(_table(['Conference ranking', 'Value', 'Rank', 'Best', 'Worst'], [
+            [ranking['label'], format_stat(ranking['value'], ranking['format']),
+             f"{ranking['rank']}/{ranking['teams']}",
+             format_stat(ranking['best'], ranking['format']), format_stat(ranking['worst'], ranking['format'])]
+            for ranking in team['rankings'].values()
+        ]))
+
+    for pitcher in report['pitchers']:
+        line = pitcher['line']
+        out.append(f"<h2>{html.escape(str(pitcher['player']))} - #{html.escape(str(pitcher['number']))}</h2>")
+        out.append(f"<p>{html.escape(' | '.join(str(pitcher[k]) for k in ('yr', 'pos', 'b_t')))}</p>")
+        out.append(_table(['App', 'GS', 'IP', 'ERA', 'WHIP', 'W-L', 'SV', 'SO', 'BB', 'K/BB', 'H', 'HR',
+                           'BAA', 'OPS', 'K%', 'BB%', 'GB%'], [[
+            format_stat(line['app'], ''), format_stat(line['gs'], ''), format_stat(line['ip'], ''),
+            format_stat(line['era']), format_stat(line['whip']), f"{line['w'] or 0}-{line['l'] or 0}",
+            format_stat(line['sv'], ''), format_stat(line['so'], ''), format_stat(line['bb'], ''),
+            format_stat(line['k_bb_ratio']), format_stat(line['h'], ''), format_stat(line['hr_a'], ''),
+            format_stat(line['BAA'], '.3f'), format_stat(line['ops'], '.3f'),
+            format_stat(line['k_perc'], percent=True), format_stat(line['bb_perc'], percent=True),
+            format_stat(line['groundout_perc'], percent=True),
+        ]]))
+        if pitcher['percentiles']:
+            out.append(_percentile_svg(pitcher['percentiles'], pitcher['percentile_bands']))
+        if pitcher['splits']:
+            out.append(_table(['Situation', 'IP', 'H', 'BB', 'SO', 'BAA', 'OPS', 'OPS %ile'], [
+                [split['label'], format_stat(split['ip'], ''), format_stat(split['h'], ''), format_stat(split['bb'], ''),
+                 format_stat(split['so'], ''), format_stat(split['BAA'], '.3f'), format_stat(split['ops'], '.3f'),
+                 format_stat(split['ops_percentile'], '') if split['ops_percentile'] is not None else '-']
+                for split in pitcher['splits']
+            ]))
+        if pitcher['history']:
+            out.append(_table(['Season', 'IP', 'ERA', 'WHIP', 'K%', 'BB%', 'OPS'], [
+                [season['year'], format_stat(season['ip'], ''), format_stat(season['era']), format_stat(season['whip']),
+                 format_stat(season['k_perc'], percent=True), format_stat(season['bb_perc'], percent=True),
+                 format_stat(season['ops'], '.3f')]
+                for season in pitcher['history']
+            ]))
+        if pitcher['comparables']:
+            out.append(_table(['Comparable pitcher', 'Team', 'IP', 'ERA', 'K%', 'BB%', 'OPS'], [
+                [comp['player'], comp['team'], format_stat(comp['ip'], ''), format_stat(comp['era']),
+                 format_stat(comp['k_perc'], percent=True), format_stat(comp['bb_perc'], percent=True),
+                 format_stat(comp['ops'], '.3f')]
+                for comp in pitcher['comparables']
+            ]))
+
+    out.append('</body></html>')
+    return '\n'.join(out)
@@ -0,0 +1,300 @@
+import argparse
+import io
+import os
+import sys
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from cne_cache import DEFAULT_CACHE_DIR, prune_bytes
+from cne_ingest import ValidationError
+from cne_pdf_merge import PdfMerger
+from cne_pitching_reports import (
+    ComparablesIndex, PercentileIndex, ScoutingReportGenerator, SplitPercentileIndex, _build_jobs,
+    filter_main_rows, load_conference_data, load_conference_main, load_conference_splits,
+    split_pivot,
+)
+
+
+DEFAULT_PORT = 8765
+
+# Rendered PDFs kept in memory before the least recently used are evicted
+DEFAULT_CACHE_BYTES = 256 * 2 ** 20
+
+
+class PdfCache:
+    """Thread-safe LRU of rendered PDFs bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ReportService:
+    """Conference data, percentile index and team generators kept warm for on-demand reports.
+
+    The source CSVs (and team directories) are stat'ed on every request;
+    when any of them changes the dataset is reloaded, the rendered-PDF
+    cache is dropped and the on-disk page cache is pruned.
+    Identical requests that arrive while a render is in flight wait for
+    that render instead of starting their own.
+    """
+
+    def __init__(self, conference_csv, team_csvs=None, cache_dir=DEFAULT_CACHE_DIR,
+                 max_cache_bytes=DEFAULT_CACHE_BYTES):
+        self.conference_csv = conference_csv
+        self.team_csvs = team_csvs or []
+        self.cache_dir = cache_dir
+        self.pdfs = PdfCache(max_cache_bytes)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        # ReportLab keeps module-level state, so renders run one at a time
+        self._render_lock = threading.Lock()
+        self._signature = None
+        self._generation = 0
+        self.generators = {}
+        # Team files (and team directories) of the loaded dataset
+        self._team_sources = []
+        self.reload_if_changed()
+
+    def _source_paths(self):
+        return [self.conference_csv] + self._team_sources
+
+    def _current_signature(self, paths):
+        signature = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                signature.append((path, None, None))
+            else:
+                signature.append((path, st.st_size, st.st_mtime_ns))
+        return tuple(signature)
+
+    def _load(self):
+        if self.team_csvs:
+            conference_raw = None
+            conference_df = load_conference_main(self.conference_csv, self.cache_dir)
+            conference_splits = load_conference_splits(self.conference_csv, self.cache_dir)
+        else:
+            conference_raw = load_conference_data(self.conference_csv, self.cache_dir)
+            conference_df = filter_main_rows(conference_raw)
+            conference_splits = conference_raw
+        percentile_index = PercentileIndex(conference_df)
+        conference_splits = split_pivot(conference_splits)
+        split_index = SplitPercentileIndex(conference_splits)
+        comparables_index = ComparablesIndex(conference_df, conference_splits)
+
+        generators = {}
+        sources = []
+        for team_source, team_name, _ in _build_jobs(self.team_csvs, conference_raw, None,
+                                                     sources=sources):
+            generator = ScoutingReportGenerator(team_source, conference_df=conference_df,
+                                                percentile_index=percentile_index,
+                                                split_index=split_index,
+                                                comparables_index=comparables_index,
+                                                team_name=team_name, cache_dir=self.cache_dir)
+            generators[int(generator.df['team_id'].iloc[0])] = generator
+        # Conference rankings are shared by every summary page
+        totals = next(iter(generators.values())).conference_team_totals if generators else None
+        for generator in generators.values():
+            generator._conference_team_totals = totals
+        return generators, sources
+
+    def reload_if_changed(self):
+        """Reload the dataset if a source CSV changed; returns the dataset generation."""
+        with self._lock:
+            signature = self._current_signature(self._source_paths())
+            if signature == self._signature:
+                return self._generation
+            self.generators, self._team_sources = self._load()
+            self._signature = self._current_signature(self._source_paths())
+            self._generation += 1
+            self.pdfs.clear()
+            if self.cache_dir is not None:
+                # Pages of the previous dataset are no longer requested
+                prune_bytes('pages', self.cache_dir)
+            print(f"Loaded {len(self.generators)} team(s) from {self.conference_csv}")
+            return self._generation
+
+    def _get(self, key, render):
+        data = self.pdfs.get(key)
+        if data is not None:
+            return data
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            with self._render_lock:
+                data = render()
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            self.pdfs.put(key, data)
+            future.set_result(data)
+            return data
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def team_pdf(self, team_id):
+        generation = self.reload_if_changed()
+        generator = self.generators.get(team_id)
+        if generator is None:
+            raise KeyError(f"Unknown team_id {team_id}")
+
+        def render():
+            buffer = io.BytesIO()
+            merger = PdfMerger(buffer)
+            generator.write_pages(merger)
+            merger.close(title=f"{generator.team_name} Pitching Scouting Report")
+            return buffer.getvalue()
+
+        return self._get(('team', generation, team_id), render)
+
+    def pitcher_pdf(self, player, team_id=None):
+        generation = self.reload_if_changed()
+        teams = [tid for tid, generator in self.generators.items()
+                 if player in generator.player_rows
+                 and not generator.player_rows[player].main.empty
+                 and (team_id is None or tid == team_id)]
+        if not teams:
+            raise KeyError(f"Unknown pitcher {player!r}")
+        if len(teams) > 1:
+            raise LookupError(f"Pitcher {player!r} appears on teams {teams}; add ?team=<team_id>")
+        generator = self.generators[teams[0]]
+
+        def render():
+            story = []
+            generator._add_player_page(player, story)
+            return generator._render_pages(story)
+
+        return self._get(('pitcher', generation, teams[0], player), render)
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """Serves ``/team/{team_id}.pdf`` and ``/pitcher/{player}.pdf[?team=team_id]``."""
+
+    service = None
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parts = url.path.strip('/').split('/')
+        query = parse_qs(url.query)
+        try:
+            if len(parts) != 2 or not parts[1].endswith('.pdf'):
+                raise KeyError(url.path)
+            name = unquote(parts[1][:-len('.pdf')])
+            if parts[0] == 'team':
+                data = self.service.team_pdf(int(name))
+            elif parts[0] == 'pitcher':
+                team = query.get('team')
+                data = self.service.pitcher_pdf(name, int(team[0]) if team else None)
+            else:
+                raise KeyError(url.path)
+        except ValidationError as exc:
+            # A team file was edited into an invalid state; reloads retry until it is fixed
+            self.log_error("Team files failed validation")
+            print(exc, file=sys.stderr)
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "Team files failed validation")
+            return
+        except (KeyError, ValueError) as exc:
+            self.send_error(HTTPStatus.NOT_FOUND, str(exc))
+            return
+        except LookupError as exc:
+            self.send_error(HTTPStatus.CONFLICT, str(exc))
+            return
+        except Exception:
+            self.log_error("Rendering %s failed", url.path)
+            traceback.print_exc()
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "Report rendering failed")
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve(service, host='127.0.0.1', port=DEFAULT_PORT):
+    handler = type('Handler', (ReportRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Serving scouting reports on http://{host}:{server.server_port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve pitching scouting reports over HTTP on localhost.")
+    parser.add_argument('team_csvs', nargs='*',
+                        help="Team CSV files or glob patterns. If omitted, every team_id "
+                             "in the conference file is served.")
+    parser.add_argument('-c', '--conference', default="conference_all_pitchers.csv",
+                        help="Conference CSV used for percentiles and rankings")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--cache-mb', type=float, default=DEFAULT_CACHE_BYTES / 2 ** 20,
+                        help="Memory for rendered PDFs before LRU eviction (default: %(default)s)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help="Directory for the parsed-CSV and page cache (default: %(default)s)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Do not use the on-disk cache")
+    args = parser.parse_args(argv)
+
+    try:
+        service = ReportService(args.conference, args.team_csvs,
+                                None if args.no_cache else args.cache_dir,
+                                int(args.cache_mb * 2 ** 20))
+    except ValidationError as exc:
+        raise SystemExit(str(exc))
+    serve(service, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
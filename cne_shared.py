@@ -0,0 +1,166 @@
+import copy
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+# Arrays start on cache-line boundaries inside the segment
+_ALIGN = 64
+
+# Segments a worker process has attached to, kept open for its lifetime
+_attached = {}
+
+
+def _attach(name):
+    shm = _attached.get(name)
+    if shm is None:
+        try:
+            # Python 3.13+: only the creating process tracks (and unlinks) the segment
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        _attached[name] = shm
+    return shm
+
+
+def _shared_array(name, offset, dtype, shape):
+    """Read-only view of an array published in segment ``name``."""
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=_attach(name).buf, offset=offset)
+    array.flags.writeable = False
+    return array
+
+
+def _masked_array(array_type, values, mask):
+    return array_type(values, mask)
+
+
+def _categorical(codes, dtype):
+    return pd.Categorical.from_codes(codes, dtype=dtype, validate=False)
+
+
+def _frame(arrays, columns, index):
+    frame = pd.DataFrame(dict(enumerate(arrays)), index=index, copy=False)
+    frame.columns = columns
+    return frame
+
+
+class _ArrayRef:
+    """Placeholder for one published array; unpickles as a view of the segment."""
+
+    def __init__(self, payload, array):
+        self.payload = payload
+        self.array = np.ascontiguousarray(array)
+        self.offset = None
+
+    def __reduce__(self):
+        return _shared_array, (self.payload.name, self.offset, self.array.dtype.str, self.array.shape)
+
+
+class _Rebuild:
+    """Placeholder that unpickles as ``function(*args)``, args unpickled first."""
+
+    def __init__(self, function, *args):
+        self.function = function
+        self.args = args
+
+    def __reduce__(self):
+        return self.function, self.args
+
+
+class SharedPayload:
+    """An object graph whose arrays live in one shared-memory segment.
+
+    NumPy arrays and the typed columns of DataFrames (numeric, nullable
+    integer and categorical codes) anywhere under ``value`` are copied
+    once into a ``multiprocessing.shared_memory`` segment; ``data`` is the
+    pickle of everything else and is only as large as the small
+    metadata (column names, category labels, settings). ``load_shared``
+    rebuilds the graph in a worker with read-only views of the segment,
+    so every worker reads the same physical pages and per-worker memory
+    does not grow with the data. dicts, lists and instances of
+    ``share_types`` are walked; other objects are pickled as they are.
+
+    The creating process owns the segment: keep the payload open until
+    every worker that loads it has exited, then ``close()`` it.
+    """
+
+    def __init__(self, value, share_types=()):
+        self.share_types = tuple(share_types)
+        self._refs = []
+        self._shm = None
+        published = self._publish(value)
+
+        size = 0
+        for ref in self._refs:
+            ref.offset = size
+            size += -(-ref.array.nbytes // _ALIGN) * _ALIGN
+        self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for ref in self._refs:
+            target = np.ndarray(ref.array.shape, dtype=ref.array.dtype, buffer=self._shm.buf,
+                                offset=ref.offset)
+            target[...] = ref.array
+            del target
+        self.nbytes = size
+        self.data = pickle.dumps(published, protocol=pickle.HIGHEST_PROTOCOL)
+        # The graph is only needed until it is pickled
+        self._refs = []
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    def _array(self, array):
+        if array.dtype.hasobject:
+            return array
+        ref = _ArrayRef(self, array)
+        self._refs.append(ref)
+        return ref
+
+    def _column(self, array):
+        if isinstance(array, pd.Categorical):
+            return _Rebuild(_categorical, self._array(array._codes), array.dtype)
+        if isinstance(array, pd.api.extensions.ExtensionArray) and hasattr(array, '_mask'):
+            return _Rebuild(_masked_array, type(array), self._array(array._data),
+                            self._array(array._mask))
+        if isinstance(array, pd.arrays.NumpyExtensionArray):
+            return self._array(array.to_numpy())
+        return array
+
+    def _publish(self, value):
+        if isinstance(value, np.ndarray):
+            return self._array(value)
+        if isinstance(value, pd.DataFrame):
+            arrays = [self._column(value.iloc[:, i].array) for i in range(value.shape[1])]
+            index = value.index
+            if not isinstance(index, (pd.RangeIndex, pd.MultiIndex)) and not index.dtype.hasobject:
+                index = _Rebuild(pd.Index, self._array(index.to_numpy()), index.dtype, False, index.name)
+            return _Rebuild(_frame, arrays, value.columns, index)
+        if isinstance(value, dict):
+            return {key: self._publish(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [self._publish(item) for item in value]
+        if self.share_types and isinstance(value, self.share_types):
+            shared = copy.copy(value)
+            shared.__dict__ = self._publish(value.__dict__)
+            return shared
+        return value
+
+    def close(self):
+        """Release and unlink the segment; workers already attached keep their mapping."""
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def load_shared(data):
+    """Rebuild a ``SharedPayload``'s object graph from its ``data`` in this process."""
+    return pickle.loads(data)
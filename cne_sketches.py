@@ -0,0 +1,286 @@
+import argparse
+import glob
+import json
+
+import numpy as np
+import pandas as pd
+
+from cne_pitching_reports import (
+    PERCENTILE_STATS, ROW_MAIN, PercentileIndex, _float_values, _stat_values, iter_pitching_csv,
+    sum_team_counts, team_rates,
+)
+
+
+DEFAULT_K = 200
+
+# Rows read per chunk when streaming a CSV
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Smallest compactor, as in the DataSketches KLL
+_MIN_CAPACITY = 8
+
+
+def rank_error_bound(k=DEFAULT_K):
+    """Normalized rank error of a KLL sketch for a single query, at 99% confidence.
+
+    This is the empirical fit published with the Apache DataSketches KLL,
+    whose compaction schedule ``KLLSketch`` follows: about 1.3% of ``n``
+    for ``k=200``, i.e. a reported percentile is within ~1.3 points of the
+    exact one. Only a sketch of at most ``k`` values is exact: the first
+    compaction (at ``k + 1`` values) already halves the stored items.
+    """
+    return 2.296 / k ** 0.9723
+
+
+class KLLSketch:
+    """Mergeable quantile sketch (Karnin, Lang and Liberty) over float values.
+
+    Values live in compactors of geometrically shrinking capacity; an item
+    at level ``h`` stands for ``2 ** h`` inputs. When the sketch is over
+    capacity the lowest full level is sorted and every other item (random
+    offset) is promoted, so memory is ``O(k log(n / k))`` whatever ``n``
+    is. Two sketches with the same ``k`` merge level by level with the
+    same error bound (``rank_error_bound``). Compaction coins come from a
+    seeded generator, so the same inputs in the same order give the same
+    sketch.
+    """
+
+    def __init__(self, k=DEFAULT_K, seed=0):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+        self._sorted = None
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(_MIN_CAPACITY, int(np.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values):
+        """Add an array of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.n += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold ``other`` into this sketch in place; returns self."""
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with k={self.k} and k={other.k}")
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        self._sorted = None
+        while (sum(len(items) for items in self.levels)
+               > sum(self._capacity(level) for level in range(len(self.levels)))):
+            level = next(level for level, items in enumerate(self.levels)
+                         if len(items) >= self._capacity(level))
+            if level + 1 == len(self.levels):
+                self.levels.append(np.empty(0))
+            items = np.sort(self.levels[level])
+            # An odd item out stays behind at its current weight
+            keep = len(items) % 2
+            promoted = items[keep + self._rng.integers(2)::2]
+            self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            self.levels[level] = items[:keep]
+
+    @property
+    def retained(self):
+        """Number of items actually stored."""
+        return sum(len(items) for items in self.levels)
+
+    def _sorted_items(self):
+        if self._sorted is None:
+            items = np.concatenate(self.levels)
+            weights = np.concatenate([np.full(len(level_items), 2.0 ** level)
+                                      for level, level_items in enumerate(self.levels)])
+            order = np.argsort(items, kind='stable')
+            self._sorted = (items[order], np.cumsum(weights[order]))
+        return self._sorted
+
+    def rank_fraction(self, values):
+        """Estimated fraction of inputs ``<=`` each of ``values``."""
+        values = np.asarray(values, dtype=float)
+        if self.n == 0:
+            return np.full(values.shape, np.nan)
+        items, cumulative = self._sorted_items()
+        positions = np.searchsorted(items, values, side='right')
+        ranks = np.where(positions > 0, cumulative[np.maximum(positions - 1, 0)], 0.0)
+        return ranks / self.n
+
+    def quantile(self, q):
+        """Estimated value at each normalized rank in ``q`` (0-1)."""
+        q = np.asarray(q, dtype=float)
+        if self.n == 0:
+            return np.full(q.shape, np.nan)
+        items, cumulative = self._sorted_items()
+        positions = np.searchsorted(cumulative, q * self.n, side='left')
+        return items[np.minimum(positions, len(items) - 1)]
+
+
+class SketchPercentileIndex(PercentileIndex):
+    """PercentileIndex answered from KLL sketches instead of sorted arrays.
+
+    Percentiles are within ``rank_error_bound(k) * 100`` points of the
+    exact ones (and exact while a stat has at most ``k`` values, as in one
+    conference).
+    """
+
+    def __init__(self, sketches, stats_config=PERCENTILE_STATS):
+        self.stats_config = stats_config
+        self.sketches = sketches
+
+    def size(self, stat):
+        return self.sketches[stat].n
+
+    def rank_fraction(self, stat, values):
+        return self.sketches[stat].rank_fraction(values)
+
+
+class ConferenceSketch:
+    """Bounded-memory summary of conference data, built in one streaming pass.
+
+    Holds one KLLSketch per percentile stat (over qualified pitchers only,
+    like PercentileIndex) and the per-team sums of the counting stats,
+    from which the ranking rates are derived exactly. Summaries of
+    separate files or chunks merge with ``merge``. Memory depends on the
+    number of teams and ``k``, not on the number of rows.
+    """
+
+    def __init__(self, k=DEFAULT_K, stats_config=PERCENTILE_STATS):
+        self.k = k
+        self.stats_config = stats_config
+        self.sketches = {stat: KLLSketch(k, seed=seed) for seed, stat in enumerate(stats_config)}
+        self.team_sums = None
+        self.rows = 0
+        self.pitchers = 0
+
+    def add_frame(self, df):
+        """Fold a classified pitching frame (or chunk of one) into the summary."""
+        self.rows += len(df)
+        main = df[np.asarray(df['row_type'] == ROW_MAIN)]
+        self.pitchers += len(main)
+        ip = _float_values(main['ip'])
+        for stat, config in self.stats_config.items():
+            qualified = ip >= config.get('min_ip', 10)
+            self.sketches[stat].update(_stat_values(main, stat)[qualified])
+        self._add_team_sums(sum_team_counts(main))
+        return self
+
+    def _add_team_sums(self, sums):
+        if self.team_sums is None:
+            self.team_sums = sums
+        else:
+            self.team_sums = self.team_sums.add(sums, fill_value=0)
+
+    def add_csv(self, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Stream a pitching CSV into the summary ``chunk_rows`` rows at a time."""
+        for chunk in iter_pitching_csv(path, chunk_rows):
+            self.add_frame(chunk)
+        return self
+
+    def merge(self, other):
+        """Fold another ConferenceSketch (same ``k`` and stats) into this one."""
+        if set(other.sketches) != set(self.sketches):
+            raise ValueError("Cannot merge sketches over different stats")
+        for stat, sketch in other.sketches.items():
+            self.sketches[stat].merge(sketch)
+        if other.team_sums is not None:
+            self._add_team_sums(other.team_sums)
+        self.rows += other.rows
+        self.pitchers += other.pitchers
+        return self
+
+    def percentile_index(self):
+        return SketchPercentileIndex(self.sketches, self.stats_config)
+
+    def team_totals(self):
+        """Per-team totals and rates, as ``compute_team_totals`` gives for the full data."""
+        if self.team_sums is None:
+            return None
+        return team_rates(self.team_sums.sort_index())
+
+    @property
+    def error_bound(self):
+        return rank_error_bound(self.k)
+
+    def save(self, path):
+        """Write the summary to an ``.npz`` file (no pickled objects)."""
+        arrays = {}
+        for stat, sketch in self.sketches.items():
+            arrays[f'{stat}/items'] = np.concatenate(sketch.levels)
+            arrays[f'{stat}/level_sizes'] = np.array([len(items) for items in sketch.levels])
+        meta = {'k': self.k, 'rows': self.rows, 'pitchers': self.pitchers,
+                'stats': self.stats_config, 'n': {stat: s.n for stat, s in self.sketches.items()}}
+        if self.team_sums is not None:
+            arrays['team_sums/index'] = self.team_sums.index.to_numpy(dtype=np.int64)
+            arrays['team_sums/values'] = self.team_sums.to_numpy(dtype=float)
+            meta['team_sum_columns'] = list(self.team_sums.columns)
+        arrays['meta'] = np.array(json.dumps(meta))
+        with open(path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data['meta']))
+            summary = cls(meta['k'], meta['stats'])
+            summary.rows, summary.pitchers = meta['rows'], meta['pitchers']
+            for stat, sketch in summary.sketches.items():
+                sizes = data[f'{stat}/level_sizes']
+                sketch.levels = np.split(data[f'{stat}/items'], np.cumsum(sizes)[:-1])
+                sketch.n = meta['n'][stat]
+            if 'team_sum_columns' in meta:
+                summary.team_sums = pd.DataFrame(
+                    data['team_sums/values'], columns=meta['team_sum_columns'],
+                    index=pd.Index(data['team_sums/index'], name='team_id'))
+        return summary
+
+    @classmethod
+    def from_paths(cls, paths, k=DEFAULT_K, chunk_rows=DEFAULT_CHUNK_ROWS):
+        """Summary of several CSVs and/or saved ``.npz`` summaries, merged in order."""
+        summary = cls(k)
+        for path in paths:
+            if path.endswith('.npz'):
+                summary.merge(cls.load(path))
+            else:
+                summary.merge(cls(k).add_csv(path, chunk_rows))
+        return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Summarize (national-scale) pitching CSVs into a mergeable percentile sketch.")
+    parser.add_argument('inputs', nargs='+',
+                        help="Pitching CSVs and/or earlier .npz sketches (globs allowed)")
+    parser.add_argument('-o', '--output', required=True, help="Sketch file to write (.npz)")
+    parser.add_argument('-k', type=int, default=DEFAULT_K,
+                        help="Sketch size; rank error shrinks roughly as 1/k (default: %(default)s)")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS,
+                        help="CSV rows read per chunk (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    paths = []
+    for pattern in args.inputs:
+        paths.extend(sorted(glob.glob(pattern)) or [pattern])
+    summary = ConferenceSketch.from_paths(paths, args.k, args.chunk_rows)
+    summary.save(args.output)
+    retained = sum(sketch.retained for sketch in summary.sketches.values())
+    print(f"{summary.rows} rows, {summary.pitchers} pitchers, "
+          f"{len(summary.team_sums) if summary.team_sums is not None else 0} teams "
+          f"-> {args.output} ({retained} sketch items kept)")
+    print(f"Percentiles within +/-{summary.error_bound * 100:.1f} points (99% confidence)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,378 @@
+import argparse
+import glob
+import json
+import sqlite3
+import threading
+from collections import Counter, namedtuple
+
+import numpy as np
+import pandas as pd
+
+from cne_cache import file_digest
+from cne_pitching_reports import (
+    _COUNT_COLUMNS, _TOTAL_COLUMNS, DERIVED_COLUMNS, PITCHING_SCHEMA, ROW_MAIN, ROW_TYPES,
+    PercentileIndex, classify_rows, derive_pitching_stats, ip_to_outs, read_pitching_csv,
+    team_rates,
+)
+
+
+DEFAULT_WAREHOUSE = 'pitching_stats.sqlite'
+
+# Every stored row carries the loader's columns plus the derived ones
+WAREHOUSE_COLUMNS = list(PITCHING_SCHEMA) + ['outs', 'row_type']
+
+_SQL_TYPES = {'category': 'TEXT', 'float64': 'REAL'}
+
+# Columns stored per row besides the partition keys, in table order
+_ROW_COLUMNS = ['row_order'] + [c for c in WAREHOUSE_COLUMNS if c not in ('year', 'team_id')]
+_INSERT_COLUMNS = ['year', 'team_id'] + _ROW_COLUMNS
+
+
+# Columns a delta adds to a stored row; IP, ERA and the rates are re-derived
+DELTA_COLUMNS = [c for c in _COUNT_COLUMNS if c not in DERIVED_COLUMNS] + ['p_oab', 'pitches', 'outs']
+
+# Team-season sums of the main lines, as sum_team_counts gives them
+_TEAM_SUMS_SQL = ', '.join(f'TOTAL("{column}") AS "{column}"' for column in _TOTAL_COLUMNS)
+
+# Team-seasons (year, team_id) and pitchers (year, team_id, player) a delta changed
+ChangeSet = namedtuple('ChangeSet', ['teams', 'pitchers'])
+
+
+def _row_keys(df):
+    """(year, team_id, player, line) keys, where a line is the season line or a split by name."""
+    main = np.asarray(df['row_type'] == ROW_MAIN)
+    return pd.MultiIndex.from_arrays([
+        df['year'].to_numpy(dtype='int64'), df['team_id'].to_numpy(dtype='int64'),
+        df['player'].astype(str).to_numpy(),
+        np.where(main, ROW_MAIN, df['number'].astype(str).to_numpy()),
+    ], names=['year', 'team_id', 'player', 'line'])
+
+
+def _rederive(df):
+    """Box-score IP, ERA and the rate columns of rows whose counts and outs changed.
+
+    Like ``derive_pitching_stats``, a line without outs keeps an inf ERA
+    (runs allowed) or NaN (none), so it ranks last rather than first.
+    """
+    outs = df['outs'].to_numpy(dtype=float, na_value=0)
+    er = df['er'].to_numpy(dtype=float, na_value=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        era = er * 27 / outs
+    return derive_pitching_stats(df.assign(ip=outs // 3 + (outs % 3) / 10, era=era))
+
+
+def _sql_type(name):
+    if name == 'row_type':
+        return 'TEXT'
+    return _SQL_TYPES.get(PITCHING_SCHEMA.get(name), 'INTEGER')
+
+
+class StatWarehouse:
+    """Multi-season pitching store in a single SQLite file.
+
+    Rows are kept in ``(year, team_id)`` partitions: ingesting a CSV
+    replaces each partition it contains in one transaction, and a source
+    whose SHA-256 is already recorded is skipped. Lookups by player use
+    the ``(player, year)`` index, so a pitcher's multi-year line or a past
+    season's conference is read without touching historical CSVs.
+    The connection is opened lazily and is not pickled, so a warehouse
+    can be handed to worker processes.
+    """
+
+    def __init__(self, path=DEFAULT_WAREHOUSE):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+        self._percentile_indexes = {}
+
+    def __getstate__(self):
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._create_tables()
+        return self._conn
+
+    def _create_tables(self):
+        columns = ', '.join(f'"{name}" {_sql_type(name)}' for name in _ROW_COLUMNS[1:])
+        row_type = ', '.join(f"'{t}'" for t in ROW_TYPES)
+        with self._conn:
+            self._conn.executescript(f"""
+                CREATE TABLE IF NOT EXISTS partitions (
+                    year INTEGER NOT NULL,
+                    team_id INTEGER NOT NULL,
+                    source TEXT,
+                    sha256 TEXT,
+                    rows INTEGER,
+                    PRIMARY KEY (year, team_id)
+                );
+                CREATE TABLE IF NOT EXISTS pitching (
+                    year INTEGER NOT NULL,
+                    team_id INTEGER NOT NULL,
+                    row_order INTEGER NOT NULL,
+                    {columns},
+                    CHECK (row_type IN ({row_type}))
+                );
+                CREATE INDEX IF NOT EXISTS pitching_partition ON pitching (year, team_id, row_order);
+                CREATE INDEX IF NOT EXISTS pitching_player ON pitching (player, year);
+                CREATE TABLE IF NOT EXISTS team_sums (
+                    year INTEGER NOT NULL,
+                    team_id INTEGER NOT NULL,
+                    {', '.join(f'"{column}" REAL' for column in _TOTAL_COLUMNS)},
+                    ip_numeric REAL,
+                    PRIMARY KEY (year, team_id)
+                );
+            """)
+            # Warehouses written before team sums were kept
+            self._conn.execute(f"""
+                INSERT INTO team_sums
+                SELECT year, team_id, {_TEAM_SUMS_SQL}, TOTAL(outs) / 3.0 FROM pitching
+                WHERE row_type = '{ROW_MAIN}'
+                  AND (year, team_id) NOT IN (SELECT year, team_id FROM team_sums)
+                GROUP BY year, team_id
+            """)
+
+    def _update_team_sums(self, year, team_id):
+        self.conn.execute("DELETE FROM team_sums WHERE year = ? AND team_id = ?", (year, team_id))
+        self.conn.execute(f"""
+            INSERT INTO team_sums
+            SELECT year, team_id, {_TEAM_SUMS_SQL}, TOTAL(outs) / 3.0 FROM pitching
+            WHERE year = ? AND team_id = ? AND row_type = ? GROUP BY year, team_id
+        """, (year, team_id, ROW_MAIN))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _insert(self, df):
+        """Insert rows that carry the partition keys, row_order and WAREHOUSE_COLUMNS."""
+        quoted = ', '.join(f'"{name}"' for name in _INSERT_COLUMNS)
+        rows = df[_INSERT_COLUMNS].astype(object)
+        self.conn.executemany(
+            f"INSERT INTO pitching ({quoted}) VALUES ({', '.join('?' * len(_INSERT_COLUMNS))})",
+            rows.where(rows.notna(), None).itertuples(index=False, name=None))
+
+    def ingest_frame(self, df, source=None, sha256=None):
+        """Replace the ``(year, team_id)`` partitions present in ``df``; returns them."""
+        df = df.reindex(columns=WAREHOUSE_COLUMNS)
+        partitions = []
+        with self._lock, self.conn:
+            for (year, team_id), part in df.groupby(['year', 'team_id'], sort=True, dropna=True):
+                year, team_id = int(year), int(team_id)
+                self.conn.execute("DELETE FROM pitching WHERE year = ? AND team_id = ?",
+                                  (year, team_id))
+                self._insert(part.assign(row_order=range(len(part))))
+                self.conn.execute("INSERT OR REPLACE INTO partitions VALUES (?, ?, ?, ?, ?)",
+                                  (year, team_id, source, sha256, len(part)))
+                self._update_team_sums(year, team_id)
+                partitions.append((year, team_id))
+        self._percentile_indexes.clear()
+        return partitions
+
+    def apply_delta(self, delta, source=None):
+        """Add per-game (or per-scrape difference) counts to the stored season lines.
+
+        ``delta`` has the pipeline CSV's columns. The counts and IP of each
+        row are added to the stored row of the same team-season, pitcher
+        and line (season line, or split by name); rows not stored yet are
+        appended. Only the touched pitchers' rows are read and rewritten,
+        the touched teams' sums are re-totalled, and a season
+        PercentileIndex already built is patched in place, so a refresh
+        costs in proportion to the day's games rather than the season.
+        Returns the ChangeSet of what changed.
+        """
+        delta = delta[delta['year'].notna().to_numpy()]
+        if 'outs' not in delta.columns:
+            delta = delta.assign(outs=ip_to_outs(delta['ip']))
+        if 'row_type' not in delta.columns:
+            delta = delta.assign(row_type=classify_rows(delta))
+        counts = [column for column in DELTA_COLUMNS if column in delta.columns]
+        keys = _row_keys(delta)
+        amounts = delta[counts].astype(float).fillna(0).set_index(keys)
+        amounts = amounts.groupby(level=list(range(4)), sort=False).sum()
+        # Lines whose counts do not move change nothing downstream
+        amounts = amounts[(amounts.to_numpy() != 0).any(axis=1)]
+        if amounts.empty:
+            return ChangeSet(set(), set())
+        players = list(amounts.index.unique('player'))
+        years = [int(year) for year in amounts.index.unique('year')]
+
+        with self._lock, self.conn:
+            stored = self._read(
+                f"SELECT rowid AS row_id, * FROM pitching "
+                f"WHERE player IN ({', '.join('?' * len(players))}) "
+                f"AND year IN ({', '.join('?' * len(years))})", players + years)
+            positions = _row_keys(stored).get_indexer(amounts.index)
+            old = stored.iloc[positions[positions >= 0]]
+            updated = old.assign(**{
+                column: old[column].to_numpy(dtype=float, na_value=0) + values.to_numpy()
+                for column, values in amounts[positions >= 0].items()})
+
+            # Lines seen for the first time go after the partition's last row
+            new = delta.set_index(keys)
+            new = new[~new.index.duplicated()].reindex(amounts.index[positions < 0])
+            new = new.assign(**{column: values.to_numpy()
+                                for column, values in amounts[positions < 0].items()})
+            new = new.reset_index(drop=True)
+            partition = [(int(year), int(team_id)) for year, team_id in zip(new['year'], new['team_id'])]
+            next_order = {key: self.conn.execute(
+                "SELECT COALESCE(MAX(row_order) + 1, 0) FROM pitching WHERE year = ? AND team_id = ?",
+                key).fetchone()[0] for key in set(partition)}
+            new['row_order'] = ([next_order[key] for key in partition]
+                                + new.groupby(['year', 'team_id']).cumcount().to_numpy())
+
+            rows = pd.concat([updated.drop(columns='row_id'),
+                              new.reindex(columns=updated.columns.drop('row_id'))],
+                             ignore_index=True)
+            rows = _rederive(rows.astype({column: PITCHING_SCHEMA.get(column, 'Int16')
+                                          for column in counts}))
+            self.conn.executemany("DELETE FROM pitching WHERE rowid = ?",
+                                  [(int(row_id),) for row_id in old['row_id']])
+            self._insert(rows)
+
+            added_rows = Counter(partition)
+            teams = set((int(year), int(team_id)) for year, team_id, _, _ in amounts.index)
+            for year, team_id in sorted(teams):
+                added = added_rows[year, team_id]
+                self.conn.execute("""
+                    INSERT INTO partitions VALUES (?, ?, ?, NULL, ?)
+                    ON CONFLICT (year, team_id) DO UPDATE
+                    SET source = excluded.source, sha256 = NULL, rows = rows + ?
+                """, (year, team_id, source, added, added))
+                self._update_team_sums(year, team_id)
+
+            old_main = old[np.asarray(old['row_type'] == ROW_MAIN)]
+            new_main = rows[np.asarray(rows['row_type'] == ROW_MAIN)]
+            for year in years:
+                index = self._percentile_indexes.get(year)
+                if index is None:
+                    self._percentile_indexes.pop(year, None)
+                    continue
+                index.replace(old_main[old_main['year'].to_numpy() == year],
+                              new_main[new_main['year'].to_numpy() == year])
+
+        pitchers = set((int(year), int(team_id), player) for year, team_id, player, _ in amounts.index)
+        return ChangeSet(teams, pitchers)
+
+    def apply_delta_csv(self, path):
+        """``apply_delta`` for a CSV of per-game or per-scrape differences."""
+        return self.apply_delta(read_pitching_csv(path), source=path)
+
+    def ingest_csv(self, path, force=False):
+        """Load one pipeline CSV; skipped (returns []) if the same file was ingested before."""
+        sha256 = file_digest(path)
+        if not force:
+            seen = self.conn.execute("SELECT 1 FROM partitions WHERE sha256 = ? LIMIT 1",
+                                     (sha256,)).fetchone()
+            if seen:
+                return []
+        return self.ingest_frame(read_pitching_csv(path), source=path, sha256=sha256)
+
+    def _read(self, sql, params=()):
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        dtypes = {name: dtype for name, dtype in PITCHING_SCHEMA.items() if name in df.columns}
+        df = df.astype(dtypes)
+        df['outs'] = df['outs'].astype('Int16')
+        df['row_type'] = pd.Categorical(df['row_type'], categories=ROW_TYPES)
+        return df
+
+    def _frame(self, sql, params=()):
+        with self._lock:
+            df = self._read(sql, params)
+        return df.drop(columns=['row_order'], errors='ignore')
+
+    def years(self):
+        return [year for (year,) in self.conn.execute(
+            "SELECT DISTINCT year FROM partitions ORDER BY year")]
+
+    def teams(self, year):
+        return [team_id for (team_id,) in self.conn.execute(
+            "SELECT team_id FROM partitions WHERE year = ? ORDER BY team_id", (int(year),))]
+
+    def team_rows(self, year, team_id):
+        """Every row (main, split, totals) of one team-season, in file order."""
+        return self._frame("SELECT * FROM pitching WHERE year = ? AND team_id = ? ORDER BY row_order",
+                           (int(year), int(team_id)))
+
+    def conference_main(self, year):
+        """Main stat lines of every pitcher in one season."""
+        return self._frame("SELECT * FROM pitching WHERE year = ? AND row_type = ? "
+                           "ORDER BY team_id, row_order", (int(year), ROW_MAIN))
+
+    def player_seasons(self, player, team_id=None):
+        """A pitcher's main stat line for every stored season, oldest first."""
+        sql = "SELECT * FROM pitching WHERE player = ? AND row_type = ?"
+        params = [str(player), ROW_MAIN]
+        if team_id is not None:
+            sql += " AND team_id = ?"
+            params.append(int(team_id))
+        return self._frame(sql + " ORDER BY year, team_id", params)
+
+    def percentile_index(self, year):
+        """PercentileIndex over one season's conference, built once per season."""
+        year = int(year)
+        if year not in self._percentile_indexes:
+            conference = self.conference_main(year)
+            self._percentile_indexes[year] = PercentileIndex(conference) if len(conference) else None
+        return self._percentile_indexes[year]
+
+    def team_totals(self, year):
+        """``compute_team_totals`` of one season, derived from the kept per-team sums."""
+        with self._lock:
+            sums = pd.read_sql_query("SELECT * FROM team_sums WHERE year = ? ORDER BY team_id",
+                                     self.conn, params=(int(year),))
+        return team_rates(sums.drop(columns='year').set_index('team_id'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Ingest pitching CSVs from the R pipeline into the stat warehouse.")
+    parser.add_argument('csvs', nargs='+', help="CSV files or glob patterns")
+    parser.add_argument('-d', '--database', default=DEFAULT_WAREHOUSE,
+                        help="SQLite warehouse file (default: %(default)s)")
+    parser.add_argument('--force', action='store_true',
+                        help="Re-ingest files even if their contents were loaded before")
+    parser.add_argument('--delta', action='store_true',
+                        help="The CSVs hold per-game (or per-scrape) differences to add to "
+                             "the stored season lines")
+    parser.add_argument('--changes', default=None,
+                        help="With --delta, write the changed teams and pitchers to this JSON "
+                             "file (a record for scripts; report runs do not read it)")
+    args = parser.parse_args(argv)
+
+    warehouse = StatWarehouse(args.database)
+    paths = [path for pattern in args.csvs for path in sorted(glob.glob(pattern)) or [pattern]]
+    if args.delta:
+        teams, pitchers = set(), set()
+        for path in paths:
+            changes = warehouse.apply_delta_csv(path)
+            teams |= changes.teams
+            pitchers |= changes.pitchers
+            print(f"{path}: {len(changes.pitchers)} pitcher(s) on {len(changes.teams)} team(s) changed")
+        if args.changes:
+            with open(args.changes, 'w') as f:
+                json.dump({'teams': [{'year': year, 'team_id': team_id} for year, team_id in sorted(teams)],
+                           'pitchers': [{'year': year, 'team_id': team_id, 'player': player}
+                                        for year, team_id, player in sorted(pitchers)]}, f, indent=1)
+        warehouse.close()
+        return
+
+    for path in paths:
+        partitions = warehouse.ingest_csv(path, force=args.force)
+        if partitions:
+            print(f"{path}: {len(partitions)} partition(s) "
+                  f"({', '.join(f'{year}/{team_id}' for year, team_id in partitions)})")
+        else:
+            print(f"{path}: unchanged, skipped")
+    print(f"Seasons stored: {', '.join(map(str, warehouse.years()))}")
+    warehouse.close()
+
+
+if __name__ == "__main__":
+    main()